@@ -0,0 +1,278 @@
+import argparse
+import contextlib
+import io
+import json
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+import tkinter as tk
+import tracemalloc
+import typing
+import rocket_league_utils as rl_utils
+import rocket_league_tkinter as rl_tk
+from PIL import Image
+from rocket_league_tkinter.cache import IconCache
+from rocket_league_tkinter.download import IconDownloader
+from rocket_league_tkinter.imaging import ImagePipeline, RarityOverlayAtlas, resize_image
+from rocket_league_tkinter.loader import AsyncLoader
+from rocket_league_tkinter.main import DEFAULT_ITEM_IMAGE_STYLE, ShowItem
+from rocket_league_tkinter.tiles import TileAtlas
+from benchmarks.synthetic import IconServer, generate_icon, generate_inventory
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+TK_CALLS = frozenset(("call", "eval", "createcommand", "deletecommand", "setvar", "getvar", "globalsetvar",
+                      "globalgetvar", "unsetvar", "globalunsetvar"))
+
+
+class TkCallCounter:
+    """Counts the calls made into the Tcl interpreter while it is active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _profile(self, frame, event: str, arg):
+        if event == "c_call" and arg.__name__ in TK_CALLS:
+            if type(getattr(arg, "__self__", None)).__name__ == "tkapp":
+                self.count += 1
+
+    def __enter__(self) -> "TkCallCounter":
+        sys.setprofile(self._profile)
+        return self
+
+    def __exit__(self, *exc_info):
+        sys.setprofile(None)
+
+
+class Result:
+    def __init__(self, name: str, size: int, times: typing.List[float], tk_calls: int, peak_memory: int):
+        self.name = name
+        self.size = size
+        self.times = times
+        self.tk_calls = tk_calls
+        self.peak_memory = peak_memory
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "size": self.size, "best": min(self.times), "median": statistics.median(self.times),
+                "tk_calls": self.tk_calls, "peak_memory": self.peak_memory}
+
+    def __str__(self) -> str:
+        return (f"{self.name:<32}{self.size:>8}{min(self.times) * 1e3:>12.1f}"
+                f"{statistics.median(self.times) * 1e3:>12.1f}{self.tk_calls:>12}{self.peak_memory / 2 ** 20:>12.1f}")
+
+
+class Benchmark:
+    """An operation timed against a fresh state built by setup, each run gets its own state."""
+
+    def __init__(self, name: str, setup: typing.Callable[[int], typing.Any],
+                 operation: typing.Callable[[typing.Any], typing.Any],
+                 teardown: typing.Callable[[typing.Any], typing.Any] = lambda state: None):
+        self.name = name
+        self.setup = setup
+        self.operation = operation
+        self.teardown = teardown
+
+    def _run(self, size: int, wrapper: typing.ContextManager = contextlib.nullcontext()) -> float:
+        state = self.setup(size)
+        try:
+            with wrapper:
+                start_time = time.perf_counter()
+                self.operation(state)
+                return time.perf_counter() - start_time
+        finally:
+            self.teardown(state)
+
+    def run(self, size: int, repeat: int = 3) -> Result:
+        """Time the operation, then run it once more counting Tk calls and once more tracing memory."""
+        times = [self._run(size) for _ in range(repeat)]
+        counter = TkCallCounter()
+        self._run(size, counter)
+        tracemalloc.start()
+        try:
+            self._run(size)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return Result(self.name, size, times, counter.count, peak_memory)
+
+
+class InventoryBenchmarks:
+    """Benchmarks of the Inventory hot paths, run against a local icon server and throwaway caches."""
+
+    def __init__(self, root: tk.Tk, server: IconServer, virtual: bool = False, timeout: float = 120):
+        self.root = root
+        self.server = server
+        self.virtual = virtual
+        self.timeout = timeout
+        self._inventories: typing.Dict[int, typing.List[rl_tk.ItemRecord]] = {}
+        self._directory = tempfile.TemporaryDirectory()
+        self.loader = self.create_loader(pathlib.Path(self._directory.name))
+
+    def get_items(self, size: int) -> typing.List[rl_tk.ItemRecord]:
+        if size not in self._inventories:
+            self._inventories[size] = generate_inventory(size, self.server.url, self.server.icon_count)
+        return [self._copy(item) for item in self._inventories[size]]
+
+    @staticmethod
+    def _copy(item: rl_tk.ItemRecord) -> rl_tk.ItemRecord:
+        return rl_tk.ItemRecord(item.name, item.slot, item.rarity, item.quantity, item.blueprint, item.serie,
+                                item.trade_lock, item.platform, item.acquired, item.favorite, item.archived,
+                                item.color, item.certified, item.icon_url)
+
+    @staticmethod
+    def create_loader(directory: pathlib.Path) -> AsyncLoader:
+        atlas = RarityOverlayAtlas((DEFAULT_ITEM_IMAGE_STYLE.size,), directory / "overlays.png")
+        return AsyncLoader(IconDownloader(IconCache(directory / "icons")),
+                           ImagePipeline(atlas, tiles=TileAtlas(directory / "tiles")))
+
+    @staticmethod
+    def close_loader(loader: AsyncLoader):
+        loader.close()
+        loader.pipeline.tiles.flush()
+
+    def close(self):
+        self.close_loader(self.loader)
+        with contextlib.suppress(OSError):
+            self._directory.cleanup()
+
+    def create_inventory(self, loader: typing.Optional[AsyncLoader] = None) -> rl_tk.Inventory:
+        inventory = rl_tk.Inventory(self.root, None, loader or self.loader, self.virtual)
+        inventory.pack()
+        self.root.update()
+        return inventory
+
+    def destroy(self, inventory: rl_tk.Inventory):
+        inventory.slots.scheduler.cancel()
+        inventory.destroy()
+        self.root.update()
+
+    def wait_idle(self, inventory: rl_tk.Inventory):
+        deadline = time.perf_counter() + self.timeout
+        while not inventory.slots.scheduler.is_idle():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("Tiles did not finish loading.")
+            self.root.update()
+            time.sleep(0.001)
+
+    def add_items(self) -> Benchmark:
+        def setup(size: int):
+            return self.create_inventory(), self.get_items(size)
+
+        def operation(state):
+            inventory, items = state
+            inventory.add_items(items)
+            self.root.update_idletasks()
+
+        return Benchmark("Slots.add_items", setup, operation, lambda state: self.destroy(state[0]))
+
+    def filter_and_sort(self) -> Benchmark:
+        def setup(size: int) -> rl_tk.Inventory:
+            inventory = self.create_inventory()
+            inventory.add_items(self.get_items(size))
+            inventory.slots.scheduler.cancel()
+            inventory.name_filter.insert(0, "oc")
+            inventory.rarity_filter.set(rl_utils.RARITIES[-1])
+            inventory.sort_by.set("Quality")
+            return inventory
+
+        def operation(inventory: rl_tk.Inventory):
+            inventory.on_filter_or_sort()
+            inventory.slots.scheduler.cancel()
+            self.root.update_idletasks()
+
+        return Benchmark("Inventory.on_filter_or_sort", setup, operation, self.destroy)
+
+    def apply_filter(self) -> Benchmark:
+        def setup(size: int) -> rl_tk.Inventory:
+            inventory = self.create_inventory()
+            inventory.add_items(self.get_items(size))
+            inventory.sort_by.set("Alphabetical")
+            inventory.on_filter_or_sort()
+            inventory.sort_by.set("Most Recent")
+            inventory.slots.scheduler.cancel()
+            return inventory
+
+        def operation(inventory: rl_tk.Inventory):
+            inventory.apply_filter()
+            inventory.slots.scheduler.cancel()
+            self.root.update_idletasks()
+
+        return Benchmark("Inventory.apply_filter", setup, operation, self.destroy)
+
+    def load_visible(self, warm: bool) -> Benchmark:
+        def setup(size: int):
+            directory = tempfile.TemporaryDirectory()
+            if warm:
+                loader = self.create_loader(pathlib.Path(directory.name))
+                inventory = self.create_inventory(loader)
+                inventory.add_items(self.get_items(size))
+                self.wait_idle(inventory)
+                self.destroy(inventory)
+                self.close_loader(loader)
+            loader = self.create_loader(pathlib.Path(directory.name))
+            inventory = self.create_inventory(loader)
+            inventory.slots.add_items(self.get_items(size))
+            inventory.slots.scheduler.cancel()
+            return directory, loader, inventory
+
+        def operation(state):
+            _, _, inventory = state
+            inventory.slots.load_items_able_to_load()
+            self.wait_idle(inventory)
+
+        def teardown(state):
+            directory, loader, inventory = state
+            self.destroy(inventory)
+            self.close_loader(loader)
+            with contextlib.suppress(OSError):
+                directory.cleanup()
+
+        return Benchmark(f"load_items_able_to_load ({'warm' if warm else 'cold'})", setup, operation, teardown)
+
+    def process_image(self, max_images: int = 500) -> Benchmark:
+        def setup(size: int):
+            tile_size = DEFAULT_ITEM_IMAGE_STYLE.size
+            items = self.get_items(min(size, max_images))
+            return [(resize_image(Image.open(io.BytesIO(generate_icon(index))), tile_size),
+                     self.loader.pipeline.atlas.get(item.rarity, tile_size)) for index, item in enumerate(items)]
+
+        def operation(images):
+            for icon, gradient in images:
+                ShowItem.process_image(icon, "", DEFAULT_ITEM_IMAGE_STYLE.size, gradient)
+
+        return Benchmark(f"ShowItem.process_image (<={max_images})", setup, operation)
+
+    def all(self) -> typing.List[Benchmark]:
+        return [self.add_items(), self.filter_and_sort(), self.apply_filter(), self.load_visible(False),
+                self.load_visible(True), self.process_image()]
+
+
+def main(arguments: typing.Optional[typing.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the inventory hot paths on synthetic inventories.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.02, help="icon server latency, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--virtual", action="store_true", help="benchmark VirtualSlots instead of Slots")
+    parser.add_argument("--only", nargs="+", help="run only the benchmarks whose name contains one of these")
+    parser.add_argument("--json", type=pathlib.Path, help="also write the results to this file")
+    arguments = parser.parse_args(arguments)
+    root = tk.Tk()
+    results = []
+    with IconServer(arguments.latency, arguments.jitter) as server:
+        benchmarks = InventoryBenchmarks(root, server, arguments.virtual)
+        print(f"{'operation':<32}{'items':>8}{'best ms':>12}{'median ms':>12}{'tk calls':>12}{'peak MiB':>12}")
+        try:
+            for benchmark in benchmarks.all():
+                if arguments.only and not any(name in benchmark.name for name in arguments.only):
+                    continue
+                for size in arguments.sizes:
+                    result = benchmark.run(size, arguments.repeat)
+                    results.append(result)
+                    print(result, flush=True)
+        finally:
+            benchmarks.close()
+    root.destroy()
+    if arguments.json is not None:
+        arguments.json.write_text(json.dumps([result.to_dict() for result in results], indent=2), encoding="utf-8")
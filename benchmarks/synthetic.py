@@ -0,0 +1,117 @@
+import datetime
+import hashlib
+import http.server
+import io
+import random
+import re
+import threading
+import time
+import typing
+import rocket_league_utils as rl_utils
+import rocket_league_tkinter as rl_tk
+from PIL import Image
+
+NAME_PARTS = ("Octane", "Dominus", "Fennec", "Breakout", "Merc", "Zomba", "Draco", "Hexed", "Cristiano", "Dieci",
+              "Apex", "Helios", "Solar", "Flare", "Nitro", "Vortex", "Shard", "Neo", "Tokyo", "Pulse", "Striker",
+              "Tunica", "Reaper", "Chaser", "Glitch", "Titan", "Saffron", "Lumen", "Ripper", "Wave")
+
+
+def generate_inventory(size: int, icon_url: typing.Optional[str] = None, icon_count: int = 256,
+                       seed: int = 0) -> typing.List[rl_tk.ItemRecord]:
+    """Generate a deterministic inventory, items are given icon urls of the stub server if icon_url is set."""
+    generator = random.Random(seed)
+    acquired = datetime.datetime(2022, 1, 1)
+    names = [f"{first} {second}" for first in NAME_PARTS for second in NAME_PARTS if first != second]
+    records = []
+    for index in range(size):
+        record = rl_tk.ItemRecord(generator.choice(names), generator.choice(rl_utils.SLOTS),
+                                  generator.choice(rl_utils.RARITIES), generator.choice((1, 1, 1, 2, 5)),
+                                  generator.random() < 0.05, generator.choice(rl_utils.SERIES),
+                                  generator.random() < 0.1, rl_utils.PC,
+                                  acquired + datetime.timedelta(minutes=generator.randrange(500000)),
+                                  color=generator.choice(rl_utils.COLORS),
+                                  certified=generator.choice(rl_utils.CERTIFICATES))
+        if icon_url is not None:
+            record.icon_url = f"{icon_url}/icons/{generator.randrange(icon_count)}.png"
+        records.append(record)
+    return records
+
+
+def generate_icon(index: int, size: int = 256) -> bytes:
+    generator = random.Random(index)
+    image = Image.new("RGBA", (size, size), tuple(generator.randrange(256) for _ in range(3)) + (255,))
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class IconServer:
+    """Local stand-in for the icon CDN, serving generated PNG icons with a configurable latency."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, icon_count: int = 256, icon_size: int = 256):
+        self.latency = latency
+        self.jitter = jitter
+        self.icon_count = icon_count
+        self.icon_size = icon_size
+        self.requests = 0
+        self._icons: typing.Dict[int, bytes] = {}
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), self._get_handler())
+        self._server.daemon_threads = True
+        self._thread: typing.Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def get_icon(self, index: int) -> bytes:
+        with self._lock:
+            if index not in self._icons:
+                self._icons[index] = generate_icon(index, self.icon_size)
+            self.requests += 1
+            return self._icons[index]
+
+    def _get_handler(self) -> typing.Type[http.server.BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+                match = re.fullmatch(r"/icons/(\d+)\.png", self.path)
+                if match is None or int(match.group(1)) >= server.icon_count:
+                    self.send_error(404)
+                    return
+                data = server.get_icon(int(match.group(1)))
+                etag = f'"{hashlib.sha256(data).hexdigest()[:16]}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "IconServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="IconServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "IconServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.close()
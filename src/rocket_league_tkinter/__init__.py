@@ -1 +1,5 @@
 from rocket_league_tkinter.main import Item, ItemWithPrice, ItemWindow, Inventory
+from rocket_league_tkinter.prices import PriceService
+from rocket_league_tkinter.residency import ResidencyManager
+from rocket_league_tkinter.snapshot import InventorySnapshot, SnapshotDiff
+from rocket_league_tkinter.store import InventoryStore, ItemRecord
@@ -0,0 +1,51 @@
+import typing
+
+_WORDS = ""
+
+
+class PrefixTrie:
+    """Case insensitive prefix tree of words, completing prefixes in alphabetical order."""
+
+    def __init__(self, words: typing.Iterable[str] = ()):
+        self._root: dict = {}
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _find_node(self, prefix: str) -> typing.Optional[dict]:
+        node = self._root
+        for char in prefix.casefold():
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def add(self, word: str):
+        node = self._root
+        for char in word.casefold():
+            node = node.setdefault(char, {})
+        words = node.setdefault(_WORDS, set())
+        if word not in words:
+            words.add(word)
+            self.size += 1
+
+    def find(self, word: str) -> typing.Optional[str]:
+        """Return the stored spelling of the word, ignoring case, or None if it was never added."""
+        node = self._find_node(word)
+        words = node.get(_WORDS) if node is not None else None
+        return min(words) if words else None
+
+    def complete(self, prefix: str, limit: int = 20) -> typing.List[str]:
+        node = self._find_node(prefix)
+        if node is None:
+            return []
+        completions = []
+        stack = [node]
+        while stack and len(completions) < limit:
+            node = stack.pop()
+            completions.extend(sorted(node.get(_WORDS, ())))
+            stack.extend(node[char] for char in sorted(node, reverse=True) if char != _WORDS)
+        return completions[:limit]
@@ -0,0 +1,63 @@
+import collections
+import tkinter as tk
+import typing
+
+_BATCH_PROC = "::rocket_league_tkinter::batch"
+_BATCH_PROC_BODY = "namespace eval ::rocket_league_tkinter {}; " \
+                   f"proc {_BATCH_PROC} {{commands}} {{set errors {{}}; foreach command $commands " \
+                   "{if {[catch {{*}$command} message]} {lappend errors $message}}; return $errors}"
+
+Command = typing.Tuple[typing.Any, ...]
+
+
+def run_commands(widget: tk.Misc, commands: typing.Sequence[Command]):
+    """Run Tcl commands in a single call into the interpreter.
+
+    A failing command does not stop the others, the errors of every failing command are raised together afterwards.
+    """
+    if not commands:
+        return
+    interpreter = widget.tk
+    try:
+        errors = interpreter.call(_BATCH_PROC, tuple(commands))
+    except tk.TclError:
+        interpreter.eval(_BATCH_PROC_BODY)
+        errors = interpreter.call(_BATCH_PROC, tuple(commands))
+    errors = interpreter.splitlist(errors)
+    if errors:
+        raise tk.TclError("\n".join(map(str, errors)))
+
+
+class CanvasBatch:
+    """Widgets with pending canvas changes, flushed together in one Tcl call per interpreter when Tk is idle."""
+
+    def __init__(self):
+        self._dirty: typing.Dict[typing.Any, None] = {}
+        self._scheduled = False
+
+    def mark(self, widget):
+        """Queue the widget, whose get_render_commands() will be run on the next flush."""
+        self._dirty[widget] = None
+        if not self._scheduled:
+            widget._root().after_idle(self.flush)
+            self._scheduled = True
+
+    def flush(self):
+        self._scheduled = False
+        dirty, self._dirty = self._dirty, {}
+        commands = collections.defaultdict(list)
+        widgets = {}
+        for widget in dirty:
+            commands[id(widget.tk)].extend(widget.get_render_commands())
+            widgets[id(widget.tk)] = widget
+        errors = []
+        for interpreter, interpreter_commands in commands.items():
+            try:
+                run_commands(widgets[interpreter], interpreter_commands)
+            except tk.TclError as error:
+                errors.append(str(error))
+        if errors:
+            raise tk.TclError("\n".join(errors))
+
+
+DEFAULT_CANVAS_BATCH = CanvasBatch()
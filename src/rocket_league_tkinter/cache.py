@@ -0,0 +1,198 @@
+import atexit
+import collections
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+import typing
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+
+DEFAULT_CACHE_ROOT = pathlib.Path.home() / ".cache" / "rocket_league_tkinter"
+DEFAULT_CACHE_DIRECTORY = DEFAULT_CACHE_ROOT / "icons"
+DEFAULT_CACHE_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_MAX_AGE = datetime.timedelta(days=7)
+
+
+class CacheEntry:
+    def __init__(self, url: str, key: str, size: int, stored_at: float, etag: typing.Optional[str] = None,
+                 last_modified: typing.Optional[str] = None):
+        self.url = url
+        self.key = key
+        self.size = size
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def to_dict(self) -> dict:
+        return {"key": self.key, "size": self.size, "stored_at": self.stored_at, "etag": self.etag,
+                "last_modified": self.last_modified}
+
+    @classmethod
+    def from_dict(cls, url: str, data: dict) -> "CacheEntry":
+        return cls(url, data["key"], data["size"], data["stored_at"], data.get("etag"), data.get("last_modified"))
+
+
+class IconCache:
+    """Content addressed disk cache of downloaded icons, keyed by icon url and evicted in LRU order.
+
+    Reads only reorder the index in memory, the new order is written with the next change or on flush.
+    """
+
+    def __init__(self, directory: typing.Union[str, os.PathLike] = DEFAULT_CACHE_DIRECTORY,
+                 max_size: int = DEFAULT_CACHE_MAX_SIZE, max_age: datetime.timedelta = DEFAULT_CACHE_MAX_AGE,
+                 flush_interval: int = 32):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.flush_interval = flush_interval
+        self._entries: typing.Optional[collections.OrderedDict[str, CacheEntry]] = None
+        self._references: typing.Counter[str] = collections.Counter()
+        self._size = 0
+        self._pending_changes = 0
+        self._order_changed = False
+        atexit.register(self.flush)
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        return self.directory / "index.json"
+
+    @property
+    def entries(self) -> "collections.OrderedDict[str, CacheEntry]":
+        if self._entries is None:
+            self._entries = self._load_index()
+            self._references = collections.Counter(entry.key for entry in self._entries.values())
+            self._size = sum(entry.size for entry in self._unique_blobs().values())
+        return self._entries
+
+    @property
+    def size(self) -> int:
+        return self._size if self._entries is not None else sum(
+            entry.size for entry in self._unique_blobs().values())
+
+    def _blob_path(self, key: str) -> pathlib.Path:
+        return self.directory / "objects" / key[:2] / key
+
+    def _load_index(self) -> "collections.OrderedDict[str, CacheEntry]":
+        entries = collections.OrderedDict()
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return entries
+        for url, entry_data in data.items():
+            try:
+                entry = CacheEntry.from_dict(url, entry_data)
+            except (KeyError, TypeError):
+                continue
+            if self._blob_path(entry.key).is_file():
+                entries[url] = entry
+        return entries
+
+    def _save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.index_path.with_suffix(".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({url: entry.to_dict() for url, entry in self.entries.items()}, file)
+        os.replace(temporary_path, self.index_path)
+        self._pending_changes = 0
+        self._order_changed = False
+
+    def _mark_changed(self):
+        self._pending_changes += 1
+        if self._pending_changes >= self.flush_interval:
+            self._save_index()
+
+    def _unique_blobs(self) -> typing.Dict[str, CacheEntry]:
+        return {entry.key: entry for entry in self.entries.values()}
+
+    def flush(self):
+        if self._pending_changes or self._order_changed:
+            self._save_index()
+
+    def lookup(self, url: str) -> typing.Optional[CacheEntry]:
+        return self.entries.get(url)
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return datetime.datetime.now().timestamp() - entry.stored_at < self.max_age.total_seconds()
+
+    @staticmethod
+    def conditional_headers(entry: typing.Optional[CacheEntry]) -> typing.Dict[str, str]:
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def read(self, entry: CacheEntry) -> typing.Optional[bytes]:
+        try:
+            data = self._blob_path(entry.key).read_bytes()
+        except OSError:
+            self.discard(entry.url)
+            return None
+        self.entries.move_to_end(entry.url)
+        self._order_changed = True
+        return data
+
+    def get(self, url: str) -> typing.Optional[bytes]:
+        """Return the cached icon for the url if it is still fresh."""
+        entry = self.lookup(url)
+        data = self.read(entry) if entry is not None and self.is_fresh(entry) else None
+        DEFAULT_METRICS.hit("icon_cache", data is not None)
+        return data
+
+    def revalidate(self, entry: CacheEntry, etag: typing.Optional[str] = None,
+                   last_modified: typing.Optional[str] = None):
+        entry.stored_at = datetime.datetime.now().timestamp()
+        entry.etag = etag or entry.etag
+        entry.last_modified = last_modified or entry.last_modified
+        self.entries.move_to_end(entry.url)
+        self._mark_changed()
+
+    def store(self, url: str, data: bytes, etag: typing.Optional[str] = None,
+              last_modified: typing.Optional[str] = None) -> CacheEntry:
+        key = hashlib.sha256(data).hexdigest()
+        entry = CacheEntry(url, key, len(data), datetime.datetime.now().timestamp(), etag, last_modified)
+        old_entry = self.entries.pop(url, None)
+        self._references[key] += 1
+        if self._references[key] == 1:
+            self._size += entry.size
+        if old_entry is not None:
+            self._release(old_entry)
+        blob_path = self._blob_path(key)
+        if not blob_path.is_file():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = blob_path.with_suffix(".tmp")
+            temporary_path.write_bytes(data)
+            os.replace(temporary_path, blob_path)
+        self.entries[url] = entry
+        self._evict()
+        self._mark_changed()
+        return entry
+
+    def discard(self, url: str):
+        entry = self.entries.pop(url, None)
+        if entry is not None:
+            self._release(entry)
+            self._mark_changed()
+
+    def clear(self):
+        for url in tuple(self.entries):
+            self.discard(url)
+        self.flush()
+
+    def _release(self, entry: CacheEntry):
+        self._references[entry.key] -= 1
+        if self._references[entry.key] > 0:
+            return
+        del self._references[entry.key]
+        self._size -= entry.size
+        with contextlib.suppress(OSError):
+            self._blob_path(entry.key).unlink()
+
+    def _evict(self):
+        while self._size > self.max_size and len(self.entries) > 1:
+            self._release(self.entries.pop(next(iter(self.entries))))
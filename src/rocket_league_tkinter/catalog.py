@@ -0,0 +1,155 @@
+import atexit
+import datetime
+import json
+import os
+import pathlib
+import threading
+import typing
+import rocket_league_utils as rl_utils
+from rocket_league_tkinter.cache import DEFAULT_CACHE_ROOT
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+
+DEFAULT_CATALOG_INDEX_PATH = DEFAULT_CACHE_ROOT / "catalog.json"
+DEFAULT_NEGATIVE_ENTRY_MAX_AGE = datetime.timedelta(days=1)
+
+
+class CatalogItemNotFound(rl_utils.ItemNotFound):
+    def __init__(self, key: typing.Tuple[str, str, str]):
+        Exception.__init__(self, f"{key[0]} was not found in the Gameflip catalog.")
+        self.key = key
+
+
+class CatalogIndex:
+    """Persisted mapping of normalized (name, slot, color) to the item icon url, unknown items included.
+
+    It is shared between the Tk thread and the loader threads, every access to its state holds its lock.
+    """
+
+    def __init__(self, path: typing.Union[str, os.PathLike] = DEFAULT_CATALOG_INDEX_PATH,
+                 negative_max_age: datetime.timedelta = DEFAULT_NEGATIVE_ENTRY_MAX_AGE, flush_interval: int = 64):
+        self.path = pathlib.Path(path)
+        self.negative_max_age = negative_max_age
+        self.flush_interval = flush_interval
+        self._urls: typing.Optional[typing.Dict[typing.Tuple[str, str, str], str]] = None
+        self._not_found: typing.Dict[typing.Tuple[str, str, str], float] = {}
+        self._names: typing.Dict[str, str] = {}
+        self._pending_changes = 0
+        self._lock = threading.RLock()
+        atexit.register(self.flush)
+
+    @staticmethod
+    def get_key(item: rl_utils.ReprItem) -> typing.Tuple[str, str, str]:
+        return tuple(" ".join(str(value).casefold().split()) for value in (item.name, item.slot, item.color))
+
+    @property
+    def urls(self) -> typing.Dict[typing.Tuple[str, str, str], str]:
+        self._ensure_loaded()
+        return self._urls
+
+    @property
+    def names(self) -> typing.List[str]:
+        """Names of the items found in the catalog, as they were spelled when first resolved."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._names.values())
+
+    def add_names(self, names: typing.Iterable[str]):
+        """Keep the names of items not resolved yet, like the full catalog listing, for the autocompletion."""
+        with self._lock:
+            self._ensure_loaded()
+            for name in names:
+                self._names.setdefault(" ".join(name.casefold().split()), name)
+            self._mark_changed()
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._urls is None:
+                self._urls = {}
+                self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        for entry in data.get("urls", ()):
+            self._urls[tuple(entry[:3])] = entry[3]
+        for entry in data.get("not_found", ()):
+            self._not_found[tuple(entry[:3])] = entry[3]
+        self._names.update(data.get("names", {}))
+
+    def _save(self):
+        with self._lock:
+            data = {"urls": [list(key) + [url] for key, url in self.urls.items()],
+                    "not_found": [list(key) + [stored_at] for key, stored_at in self._not_found.items()],
+                    "names": self._names}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary_path = self.path.with_suffix(".tmp")
+            with open(temporary_path, "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(temporary_path, self.path)
+            self._pending_changes = 0
+
+    def _mark_changed(self):
+        with self._lock:
+            self._pending_changes += 1
+            if self._pending_changes >= self.flush_interval:
+                self._save()
+
+    def flush(self):
+        with self._lock:
+            if self._pending_changes:
+                self._save()
+
+    def clear(self):
+        with self._lock:
+            self.urls.clear()
+            self._not_found.clear()
+            self._names.clear()
+            self._save()
+
+    def lookup(self, item: rl_utils.ReprItem) -> typing.Optional[str]:
+        """Return the icon url of the item if it is indexed, raising CatalogItemNotFound if it is known missing."""
+        key = self.get_key(item)
+        with self._lock:
+            url = self.urls.get(key)
+            stored_at = self._not_found.get(key)
+        if url is not None:
+            return url
+        now = datetime.datetime.now().timestamp()
+        if stored_at is not None and now - stored_at < self.negative_max_age.total_seconds():
+            raise CatalogItemNotFound(key)
+        return None
+
+    def is_indexed(self, item: rl_utils.ReprItem) -> bool:
+        """Return whether resolve() would answer the item without searching the catalog."""
+        try:
+            return self.lookup(item) is not None
+        except CatalogItemNotFound:
+            return True
+
+    def resolve(self, item: rl_utils.ReprItem, search: typing.Callable[[rl_utils.ReprItem], str]) -> str:
+        """Return the icon url of the item, searching it in the catalog only if it is not indexed yet."""
+        key = self.get_key(item)
+        try:
+            url = self.lookup(item)
+        except CatalogItemNotFound:
+            DEFAULT_METRICS.hit("catalog", True)
+            raise
+        DEFAULT_METRICS.hit("catalog", url is not None)
+        if url is not None:
+            return url
+        try:
+            url = search(item)
+        except rl_utils.ItemNotFound:
+            with self._lock:
+                self._not_found[key] = datetime.datetime.now().timestamp()
+            self._mark_changed()
+            raise
+        with self._lock:
+            self._not_found.pop(key, None)
+            self.urls[key] = url
+            self._names.setdefault(key[0], item.name)
+        self._mark_changed()
+        return url
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import datetime
+import functools
+import itertools
+import random
+import time
+import typing
+import urllib.parse
+import rocket_league_utils as rl_utils
+from rocket_league_tkinter.cache import IconCache
+from rocket_league_tkinter.lazy import lazy_import
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+
+aiohttp = lazy_import("aiohttp")
+
+DEFAULT_NOT_FOUND_MAX_AGE = datetime.timedelta(hours=1)
+RETRYABLE_STATUSES = frozenset((408, 429, 500, 502, 503, 504))
+NOT_FOUND_STATUSES = frozenset((404, 410))
+
+
+class IconNotFound(rl_utils.ItemNotFound):
+    def __init__(self, url: str):
+        Exception.__init__(self, f"The icon {url} was not found.")
+        self.url = url
+
+
+class AdaptiveTimeout:
+    """Request timeout following the latency of a host, estimated like the TCP retransmission timeout.
+
+    Latencies are measured over whole requests, body included, as the timeout applies to whole requests.
+    """
+
+    def __init__(self, initial: float = 1, minimum: float = 0.25, maximum: float = 10):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.timeout = initial
+        self.latency: typing.Optional[float] = None
+        self.deviation = 0.0
+
+    def observe(self, latency: float):
+        if self.latency is None:
+            self.latency, self.deviation = latency, latency / 2
+        else:
+            self.deviation = 0.75 * self.deviation + 0.25 * abs(self.latency - latency)
+            self.latency = 0.875 * self.latency + 0.125 * latency
+        self.timeout = min(self.maximum, max(self.minimum, self.latency + 4 * self.deviation))
+
+    def back_off(self, timeout: float) -> float:
+        """Return the timeout to retry with after a request timed out under timeout, raising the host timeout too."""
+        timeout = min(self.maximum, timeout * 2)
+        self.timeout = max(self.timeout, timeout)
+        return timeout
+
+
+class IconDownloader:
+    """Long-lived icon downloader sharing one pooled session between every request.
+
+    Failed requests are retried after a jittered exponential backoff. The timeout follows each host latency, never
+    going below timeout, and doubles on each retry after a timeout.
+    Missing icons are remembered for not_found_max_age and fail without any request meanwhile.
+    """
+
+    def __init__(self, cache: typing.Optional[IconCache] = None, max_connections: int = 32,
+                 max_connections_per_host: int = 8, keepalive_timeout: float = 30, timeout: float = 1,
+                 max_retries: int = 2, retry_backoff: float = 0.2,
+                 not_found_max_age: datetime.timedelta = DEFAULT_NOT_FOUND_MAX_AGE):
+        self.cache = cache if cache is not None else IconCache()
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.not_found_max_age = not_found_max_age
+        self._session: typing.Optional[aiohttp.ClientSession] = None
+        self._semaphores: typing.Dict[str, asyncio.Semaphore] = {}
+        self._timeouts: typing.Dict[str, AdaptiveTimeout] = {}
+        self._not_found: typing.Dict[str, float] = {}
+        self._in_flight: typing.Dict[str, asyncio.Future] = {}
+        self._waiters: typing.Counter[str] = collections.Counter()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.max_connections_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _get_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = urllib.parse.urlsplit(url).netloc
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return semaphore
+
+    def _get_timeout(self, url: str) -> AdaptiveTimeout:
+        host = urllib.parse.urlsplit(url).netloc
+        timeout = self._timeouts.get(host)
+        if timeout is None:
+            timeout = self._timeouts[host] = AdaptiveTimeout(self.timeout, self.timeout)
+        return timeout
+
+    def is_not_found(self, url: str) -> bool:
+        """Return whether the url answered 404 less than not_found_max_age ago."""
+        stored_at = self._not_found.get(url)
+        if stored_at is None:
+            return False
+        if time.monotonic() - stored_at < self.not_found_max_age.total_seconds():
+            return True
+        del self._not_found[url]
+        return False
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRYABLE_STATUSES
+        return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+    async def download(self, url: str) -> bytes:
+        """Return the icon bytes, sharing a single request between every caller asking for the same url.
+
+        The request is cancelled once every caller waiting on it has been cancelled.
+        """
+        data = self.cache.get(url)
+        if data is not None:
+            return data
+        if self.is_not_found(url):
+            DEFAULT_METRICS.hit("icon_not_found", True)
+            raise IconNotFound(url)
+        future = self._in_flight.get(url)
+        if future is None:
+            future = self._in_flight[url] = asyncio.ensure_future(self._fetch(url))
+            future.add_done_callback(functools.partial(self._forget, url))
+        self._waiters[url] += 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self._waiters[url] == 1 and not future.done():
+                future.cancel()
+                self._forget(url, future)
+            raise
+        finally:
+            self._waiters[url] -= 1
+            if self._waiters[url] <= 0:
+                del self._waiters[url]
+
+    def _forget(self, url: str, future: asyncio.Future):
+        if self._in_flight.get(url) is future:
+            del self._in_flight[url]
+
+    async def _fetch(self, url: str) -> bytes:
+        timeout = self._get_timeout(url)
+        seconds = timeout.timeout
+        for attempt in itertools.count():
+            try:
+                async with self._get_semaphore(url):
+                    return await self._request(url, timeout, seconds)
+            except Exception as error:
+                if attempt >= self.max_retries or not self.is_retryable(error):
+                    raise
+                if isinstance(error, asyncio.TimeoutError):
+                    seconds = timeout.back_off(seconds)
+            DEFAULT_METRICS.count("http_retries")
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+
+    async def _request(self, url: str, timeout: AdaptiveTimeout, seconds: float) -> bytes:
+        entry = self.cache.lookup(url)
+        headers = self.cache.conditional_headers(entry)
+        DEFAULT_METRICS.count("http_requests")
+        start_time = time.perf_counter()
+        async with self._get_session().get(url, timeout=aiohttp.ClientTimeout(total=seconds),
+                                             headers=headers) as response:
+            if response.status not in NOT_FOUND_STATUSES:
+                response.raise_for_status()
+            data = await response.read()
+        timeout.observe(time.perf_counter() - start_time)
+        if response.status in NOT_FOUND_STATUSES:
+            self._not_found[url] = time.monotonic()
+            DEFAULT_METRICS.hit("icon_not_found", False)
+            raise IconNotFound(url)
+        if response.status == 304 and entry is not None:
+            DEFAULT_METRICS.count("http_not_modified")
+            self.cache.revalidate(entry, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            data = self.cache.read(entry)
+            if data is not None:
+                return data
+            return await self._request(url, timeout, seconds)
+        self.cache.store(url, data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return data
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        self.cache.flush()
@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import html
+import os
+import pathlib
+import tkinter as tk
+import typing
+import rocket_league_utils as rl_utils
+from rocket_league_tkinter.catalog import CatalogIndex, CatalogItemNotFound
+from rocket_league_tkinter.download import IconDownloader
+from rocket_league_tkinter.imaging import get_icon_key
+from rocket_league_tkinter.lazy import lazy_import
+from rocket_league_tkinter.main import DEFAULT_CATALOG_INDEX, DEFAULT_ICON_DOWNLOADER, DEFAULT_ITEM_IMAGE_STYLE, \
+    DEFAULT_MIPMAP_CACHE, DEFAULT_OVERLAY_ATLAS, NOT_FOUND_TEXT, ItemImageStyle, ShowItem
+from rocket_league_tkinter.snapshot import DEFAULT_SNAPSHOT_PATH, InventorySnapshot
+from rocket_league_tkinter.store import ItemRecord
+
+Image = lazy_import("PIL.Image")
+ImageDraw = lazy_import("PIL.ImageDraw")
+ImageFont = lazy_import("PIL.ImageFont")
+aiohttp = lazy_import("aiohttp")
+rl_gameflip_api = lazy_import("rocket_league_gameflip_api")
+
+FORMATS = ("png", "html")
+SCREEN_DPI = 96
+
+
+@functools.lru_cache
+def get_font(font: typing.Tuple[str, int]):
+    """Return a PIL font matching a Tk font, falling back to common fonts and then to the default bitmap font."""
+    family, points = font
+    size = round(points * SCREEN_DPI / 72)
+    for name in (family, f"{family}.ttf", "segoeui.ttf", "DejaVuSans.ttf"):
+        with contextlib.suppress(OSError):
+            return ImageFont.truetype(name, size)
+    return ImageFont.load_default()
+
+
+def wrap_text(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> str:
+    lines = []
+    for word in text.split():
+        if lines and draw.textlength(f"{lines[-1]} {word}", font=font) <= width:
+            lines[-1] = f"{lines[-1]} {word}"
+        else:
+            lines.append(word)
+    return "\n".join(lines)
+
+
+def draw_text(draw: ImageDraw.ImageDraw, position: typing.Tuple[float, float, str], text: str, fill: str, font,
+              width: typing.Optional[int] = None):
+    """Draw text anchored like a Tk canvas text item, wrapped to width if given."""
+    x, y, anchor = position
+    if width is not None:
+        text = wrap_text(draw, text, font, width)
+    left, top, right, bottom = draw.multiline_textbbox((0, 0), text, font=font, align=tk.CENTER)
+    text_width, text_height = right - left, bottom - top
+    if anchor == tk.NE:
+        x = x - text_width
+    elif anchor == tk.CENTER:
+        x, y = x - text_width / 2, y - text_height / 2
+    draw.multiline_text((x - left, y - top), text, fill=fill, font=font, align=tk.CENTER)
+
+
+def render_tile(item: rl_utils.Item, data: typing.Optional[bytes],
+                style: ItemImageStyle = DEFAULT_ITEM_IMAGE_STYLE) -> Image.Image:
+    """Render the tile of the item as an Item canvas shows it, without any Tk widget."""
+    size, font, layout = style.size, get_font(style.font), style.layout
+    if data is None:
+        image = Image.new("RGBA", (size, size), "black")
+        draw_text(ImageDraw.Draw(image), layout["notfound"], NOT_FOUND_TEXT, "white", font, size)
+        return image
+    gradient = None
+    with contextlib.suppress(KeyError):
+        gradient = ShowItem.generate_gradient_by_rarity(item.rarity, size)
+    base_image = DEFAULT_MIPMAP_CACHE.get(get_icon_key(data), data).get(size)
+    image = ShowItem.process_image(base_image, item.name, size, gradient)
+    draw = ImageDraw.Draw(image)
+    for tag, options in ShowItem.get_attribute_options(item).items():
+        if options.get("state") == tk.HIDDEN:
+            continue
+        if tag == "trade_lock":
+            trade_lock = ShowItem.get_trade_lock_image(style.trade_lock_size).convert("RGBA")
+            image.alpha_composite(trade_lock, tuple(int(value) for value in layout[tag][:2]))
+        elif options.get("text"):
+            draw_text(draw, layout[tag], options["text"], options.get("fill", "white"), font)
+    return image
+
+
+def render_sheet(tiles: typing.Sequence[typing.Tuple[ItemRecord, typing.Optional[bytes]]], path: pathlib.Path,
+                 columns: int, style: ItemImageStyle = DEFAULT_ITEM_IMAGE_STYLE) -> pathlib.Path:
+    """Render a page of tiles into a PNG contact sheet, runs inside the exporter workers."""
+    size = style.size
+    rows = -(-len(tiles) // columns)
+    sheet = Image.new("RGB", (columns * size, rows * size), "black")
+    for index, (item, data) in enumerate(tiles):
+        sheet.paste(render_tile(item, data, style), ((index % columns) * size, (index // columns) * size))
+    sheet.save(path)
+    return path
+
+
+class InventoryExporter:
+    """Renders inventories into paged PNG contact sheets or a static HTML gallery, laid out like the Inventory grid.
+
+    Icons are downloaded through the icon cache on the event loop while the pages are rendered in worker processes.
+    Items whose icon url is not known yet are searched in the Gameflip catalog only if gameflip_api is given.
+    """
+
+    def __init__(self, gameflip_api: typing.Optional[rl_gameflip_api.RocketLeagueGameflipAPI] = None,
+                 downloader: IconDownloader = DEFAULT_ICON_DOWNLOADER, catalog: CatalogIndex = DEFAULT_CATALOG_INDEX,
+                 style: ItemImageStyle = DEFAULT_ITEM_IMAGE_STYLE, columns: int = 10, rows: int = 10,
+                 max_workers: typing.Optional[int] = None):
+        self.gameflip_api = gameflip_api
+        self.downloader = downloader
+        self.catalog = catalog
+        self.style = style
+        self.columns = columns
+        self.rows = rows
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def paginate(self, items: typing.Sequence[ItemRecord]) -> typing.List[typing.Sequence[ItemRecord]]:
+        page_size = self.columns * self.rows
+        return [items[start:start + page_size] for start in range(0, len(items), page_size)]
+
+    async def get_icon_url(self, item: ItemRecord) -> typing.Optional[str]:
+        if item.icon_url is None and self.gameflip_api is None:
+            with contextlib.suppress(CatalogItemNotFound):
+                return self.catalog.lookup(item)
+            return None
+        return await ShowItem.resolve_photo_url(item, self.gameflip_api, self.catalog)
+
+    async def get_icon(self, item: ItemRecord) -> typing.Optional[bytes]:
+        if item.image_state == "notfound":
+            return None
+        try:
+            url = await self.get_icon_url(item)
+            return await self.downloader.download(url) if url is not None else None
+        except (rl_utils.ItemNotFound, aiohttp.ClientError, asyncio.TimeoutError):
+            return None
+
+    async def _export_page(self, executor: concurrent.futures.Executor, semaphore: asyncio.Semaphore,
+                           page: typing.Sequence[ItemRecord], path: pathlib.Path) -> pathlib.Path:
+        async with semaphore:
+            icons = await asyncio.gather(*(self.get_icon(item) for item in page))
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, render_sheet, list(zip(page, icons)), path, self.columns, self.style)
+
+    async def export(self, items: typing.Iterable[ItemRecord], directory: typing.Union[str, os.PathLike],
+                     output_format: str = "png") -> typing.List[pathlib.Path]:
+        """Write the pages to directory and return their paths, followed by the gallery index for html."""
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        pages = self.paginate(list(items))
+        DEFAULT_OVERLAY_ATLAS.prepare()
+        semaphore = asyncio.Semaphore(self.max_workers * 2)
+        with concurrent.futures.ProcessPoolExecutor(self.max_workers) as executor:
+            paths = list(await asyncio.gather(*(
+                self._export_page(executor, semaphore, page, directory / f"page-{index + 1:04}.png")
+                for index, page in enumerate(pages))))
+        self.catalog.flush()
+        if output_format == "html":
+            paths.append(self.write_gallery(pages, paths, directory / "index.html"))
+        return paths
+
+    def get_title(self, item: ItemRecord) -> str:
+        options = ShowItem.get_attribute_options(item)
+        return " | ".join(options[tag]["text"] for tag in ("name", "color", "certified", "quantity")
+                          if options[tag].get("state") != tk.HIDDEN)
+
+    def write_gallery(self, pages: typing.Sequence[typing.Sequence[ItemRecord]],
+                      paths: typing.Sequence[pathlib.Path], path: pathlib.Path) -> pathlib.Path:
+        """Write an HTML page showing every contact sheet, each tile titled with its item attributes."""
+        size = self.style.size
+        lines = ["<!DOCTYPE html>", "<html>", "<head>", '<meta charset="utf-8">', "<title>Inventory</title>",
+                 "<style>body{background:#202020;color:white;font-family:sans-serif}</style>", "</head>", "<body>",
+                 f"<h1>Inventory ({sum(len(page) for page in pages)} items)</h1>"]
+        for index, (page, page_path) in enumerate(zip(pages, paths), 1):
+            lines.append(f"<h2>Page {index}</h2>")
+            lines.append(f'<img src="{html.escape(page_path.name)}" usemap="#page-{index}" alt="Page {index}">')
+            lines.append(f'<map name="page-{index}">')
+            for position, item in enumerate(page):
+                left, top = (position % self.columns) * size, (position // self.columns) * size
+                title = html.escape(self.get_title(item))
+                lines.append(f'<area shape="rect" coords="{left},{top},{left + size},{top + size}" '
+                             f'title="{title}" alt="{title}">')
+            lines.append("</map>")
+        lines.extend(("</body>", "</html>"))
+        path.write_text("\n".join(lines), encoding="utf-8")
+        return path
+
+    async def close(self):
+        await self.downloader.close()
+
+
+async def export_inventory(items: typing.Iterable[ItemRecord], exporter: InventoryExporter,
+                           directory: typing.Union[str, os.PathLike],
+                           output_format: str = "png") -> typing.List[pathlib.Path]:
+    try:
+        return await exporter.export(items, directory, output_format)
+    finally:
+        await exporter.close()
+
+
+def main(arguments: typing.Optional[typing.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description="Render an inventory snapshot to PNG contact sheets or HTML.")
+    parser.add_argument("output", type=pathlib.Path, help="directory the pages are written to")
+    parser.add_argument("--snapshot", type=pathlib.Path, default=DEFAULT_SNAPSHOT_PATH)
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--columns", type=int, default=10)
+    parser.add_argument("--rows", type=int, default=10)
+    parser.add_argument("--size", type=int, default=DEFAULT_ITEM_IMAGE_STYLE.size, help="tile size, in pixels")
+    parser.add_argument("--workers", type=int, help="rendering processes, one per core by default")
+    parser.add_argument("--gameflip", action="store_true",
+                        help="search the Gameflip catalog for the icons not resolved yet")
+    arguments = parser.parse_args(arguments)
+    snapshot = InventorySnapshot.load(arguments.snapshot)
+    gameflip_api = rl_gameflip_api.RocketLeagueGameflipAPI() if arguments.gameflip else None
+    exporter = InventoryExporter(gameflip_api, style=ItemImageStyle(arguments.size), columns=arguments.columns,
+                                 rows=arguments.rows, max_workers=arguments.workers)
+    paths = asyncio.run(export_inventory(snapshot.records, exporter, arguments.output, arguments.format))
+    print(f"Exported {len(snapshot.records)} items to {len(paths)} files in {arguments.output}.")
+
+
+if __name__ == "__main__":
+    main()
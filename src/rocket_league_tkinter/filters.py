@@ -0,0 +1,111 @@
+import collections
+import heapq
+import typing
+
+Condition = typing.Callable[[str, str], bool]
+
+
+class FilterIndex:
+    """Posting sets of items per attribute value and a n-gram index of names, used to filter an inventory."""
+
+    def __init__(self, attributes: typing.Iterable[str] = ("slot", "color", "certified", "rarity"),
+                 text_attribute: str = "name", gram_size: int = 3):
+        self.attributes = tuple(attributes)
+        self.text_attribute = text_attribute
+        self.gram_size = gram_size
+        self.indexed_count = 0
+        self._postings: typing.Dict[str, typing.Dict[str, typing.Set]] = {attribute: collections.defaultdict(set)
+                                                                            for attribute in self.attributes}
+        self._texts: typing.Dict[str, typing.Set] = collections.defaultdict(set)
+        self._grams: typing.Dict[str, typing.Set[str]] = collections.defaultdict(set)
+        self._results: typing.Dict[typing.Tuple[str, str], typing.Set] = {}
+        self._last_text_query: typing.Optional[typing.Tuple[str, typing.Set[str]]] = None
+
+    def _get_grams(self, text: str) -> typing.Set[str]:
+        text = text.casefold()
+        return {text[index:index + self.gram_size] for index in range(len(text) - self.gram_size + 1)}
+
+    def add(self, item):
+        for attribute in self.attributes:
+            self._postings[attribute][getattr(item, attribute)].add(item)
+        text = getattr(item, self.text_attribute)
+        if text not in self._texts:
+            for gram in self._get_grams(text):
+                self._grams[gram].add(text)
+        self._texts[text].add(item)
+        self.indexed_count += 1
+        self._results.clear()
+        self._last_text_query = None
+
+    def update(self, items: typing.Sequence):
+        """Index the items appended to the sequence since the last update."""
+        for item in items[self.indexed_count:]:
+            self.add(item)
+
+    def clear(self):
+        self.__init__(self.attributes, self.text_attribute, self.gram_size)
+
+    def filter(self, attribute: str, value: str, condition: Condition) -> typing.Set:
+        """Return the items whose attribute satisfies condition(value, attribute), the result must not be mutated."""
+        key = (attribute, value)
+        if key not in self._results:
+            if attribute == self.text_attribute:
+                self._results[key] = self._filter_text(value, condition)
+            else:
+                self._results[key] = self._filter_attribute(attribute, value, condition)
+        return self._results[key]
+
+    def _filter_attribute(self, attribute: str, value: str, condition: Condition) -> typing.Set:
+        result = set()
+        for attribute_value, items in self._postings[attribute].items():
+            if condition(value, attribute_value):
+                result.update(items)
+        return result
+
+    def _filter_text(self, value: str, condition: Condition) -> typing.Set:
+        if self._last_text_query is not None and self._last_text_query[0].casefold() in value.casefold():
+            candidates = self._last_text_query[1]
+        else:
+            candidates = self._get_text_candidates(value)
+        texts = {text for text in candidates if condition(value, text)}
+        self._last_text_query = (value, texts)
+        result = set()
+        for text in texts:
+            result.update(self._texts[text])
+        return result
+
+    def _get_text_candidates(self, value: str) -> typing.Iterable[str]:
+        grams = sorted((self._grams.get(gram, set()) for gram in self._get_grams(value)), key=len)
+        if not grams:
+            return self._texts.keys()
+        return grams[0].intersection(*grams[1:])
+
+
+class SortIndex:
+    """Items kept ordered by a key, merged incrementally as new items are indexed."""
+
+    def __init__(self, key: typing.Callable[[typing.Any], typing.Any]):
+        self.key = key
+        self.indexed_count = 0
+        self._entries: typing.List[typing.Tuple[typing.Any, int, typing.Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def items(self) -> typing.List:
+        return [item for _, _, item in self._entries]
+
+    def update(self, items: typing.Sequence):
+        """Merge the items appended to the sequence since the last update into the ordering."""
+        new_entries = sorted((self.key(item), self.indexed_count + index, item)
+                             for index, item in enumerate(items[self.indexed_count:]))
+        if new_entries:
+            self._entries = list(heapq.merge(self._entries, new_entries))
+            self.indexed_count += len(new_entries)
+
+    def ordered(self, members: typing.Collection) -> typing.List:
+        """Return the members in index order, members must be indexed items."""
+        if len(members) == len(self._entries):
+            return self.items
+        return [item for _, _, item in self._entries if item in members]
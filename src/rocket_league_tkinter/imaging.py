@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import os
+import pathlib
+import typing
+import rocket_league_utils as rl_utils
+from rocket_league_utils import rarity_utils
+from rocket_league_tkinter.cache import DEFAULT_CACHE_ROOT
+from rocket_league_tkinter.lazy import lazy_import
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+from rocket_league_tkinter.tiles import TileAtlas
+
+Image = lazy_import("PIL.Image")
+
+DEFAULT_OVERLAY_ATLAS_PATH = DEFAULT_CACHE_ROOT / "overlays.png"
+DEFAULT_MIPMAP_MIN_SIZE = 64
+DEFAULT_MIPMAP_CACHE_SIZE = 64 * 1024 * 1024
+
+
+def resize_image(photo, size: int = 125):
+    return photo.resize((size, size))
+
+
+class IconMipmaps:
+    """Chain of halved resolutions of a decoded icon, any size is served from the closest level above it."""
+
+    def __init__(self, image: Image.Image, min_size: int = DEFAULT_MIPMAP_MIN_SIZE):
+        image = image.convert("RGBA")
+        self.levels = [image]
+        while min(image.size) // 2 >= min_size:
+            image = image.reduce(2)
+            self.levels.append(image)
+
+    @property
+    def size(self) -> int:
+        return sum(level.width * level.height * 4 for level in self.levels)
+
+    def get_level(self, size: int) -> Image.Image:
+        for level in reversed(self.levels):
+            if min(level.size) >= size:
+                return level
+        return self.levels[0]
+
+    def get(self, size: int) -> Image.Image:
+        level = self.get_level(size)
+        return level if level.size == (size, size) else resize_image(level, size)
+
+
+class MipmapCache:
+    """Mipmaps of the last decoded icons, keyed by icon content and evicted in LRU order past max_size bytes."""
+
+    def __init__(self, max_size: int = DEFAULT_MIPMAP_CACHE_SIZE, min_size: int = DEFAULT_MIPMAP_MIN_SIZE):
+        self.max_size = max_size
+        self.min_size = min_size
+        self.size = 0
+        self._entries: collections.OrderedDict[str, IconMipmaps] = collections.OrderedDict()
+
+    def get(self, key: str, data: bytes) -> IconMipmaps:
+        """Return the mipmaps of the icon, decoding data only if they are not cached."""
+        mipmaps = self._entries.get(key)
+        DEFAULT_METRICS.hit("mipmaps", mipmaps is not None)
+        if mipmaps is not None:
+            self._entries.move_to_end(key)
+            return mipmaps
+        with DEFAULT_METRICS.timer("decode"):
+            mipmaps = self._entries[key] = IconMipmaps(Image.open(io.BytesIO(data)), self.min_size)
+        self.size += mipmaps.size
+        while self.size > self.max_size and len(self._entries) > 1:
+            self.size -= self._entries.popitem(last=False)[1].size
+        return mipmaps
+
+
+def get_icon_key(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def generate_gradient(color_1: tuple[int, int, int, int], color_2: tuple[int, int, int, int], width: int,
+                      height: int) -> Image:
+    """Generate a vertical gradient."""
+    base = Image.new('RGBA', (width, height), color_1)
+    top = Image.new('RGBA', (width, height), color_2)
+    column = bytes(int(255 * (y / height)) for y in range(height))
+    mask = Image.frombytes('L', (1, height), column).resize((width, height), Image.NEAREST)
+    base.paste(top, (0, 0), mask)
+    return base
+
+
+def generate_rarity_gradient(rarity: str, size: int = 125) -> typing.Optional[Image.Image]:
+    if rarity_utils.is_exactly(rl_utils.COMMON, rarity) or rarity_utils.is_exactly(rl_utils.UNCOMMON, rarity):
+        return None
+    else:
+        rarity = rarity_utils.get_repr(rarity)
+        base = rl_utils.RGB_TABLE[rarity] + (0,)
+        top = rl_utils.RGB_TABLE[rarity] + (80,)
+        return generate_gradient(base, top, size, size)
+
+
+def composite_tile(base_image: Image.Image, size: int = 125, gradient: typing.Optional[Image.Image] = None):
+    image = Image.new("RGB", (size, size), (0, 0, 0))
+    image.paste(base_image)
+    image = image.convert("RGBA")
+    if gradient is not None:
+        image = Image.alpha_composite(image, gradient)
+    return image
+
+
+class RarityOverlayAtlas:
+    """Rarity gradients for every configured size, rendered once and kept on disk as a single image."""
+
+    def __init__(self, sizes: typing.Iterable[int] = (125,),
+                 path: typing.Union[str, os.PathLike] = DEFAULT_OVERLAY_ATLAS_PATH):
+        self.sizes = tuple(sorted(set(sizes)))
+        self.path = pathlib.Path(path)
+        self._overlays: typing.Optional[typing.Dict[typing.Tuple[str, int], Image.Image]] = None
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        return self.path.with_suffix(".json")
+
+    @property
+    def overlays(self) -> typing.Dict[typing.Tuple[str, int], Image.Image]:
+        if self._overlays is None:
+            self._overlays = self._load() or self._build()
+        return self._overlays
+
+    @staticmethod
+    def _rarities() -> typing.Dict[str, typing.Tuple[int, int, int]]:
+        rarities = {}
+        for rarity in rl_utils.RARITIES:
+            if rarity_utils.is_exactly(rl_utils.COMMON, rarity) or rarity_utils.is_exactly(rl_utils.UNCOMMON, rarity):
+                continue
+            rarity = rarity_utils.get_repr(rarity)
+            if rarity in rl_utils.RGB_TABLE:
+                rarities[rarity] = tuple(rl_utils.RGB_TABLE[rarity])
+        return rarities
+
+    def _load(self) -> typing.Optional[typing.Dict[typing.Tuple[str, int], Image.Image]]:
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                index = json.load(file)
+            atlas = Image.open(self.path)
+            atlas.load()
+        except (OSError, ValueError):
+            return None
+        expected = {(rarity, size): list(color) for rarity, color in self._rarities().items() for size in self.sizes}
+        stored = {(entry["rarity"], entry["size"]): entry["color"] for entry in index}
+        if stored != expected:
+            return None
+        return {(entry["rarity"], entry["size"]): atlas.crop(tuple(entry["box"])) for entry in index}
+
+    def _build(self) -> typing.Dict[typing.Tuple[str, int], Image.Image]:
+        rarities = self._rarities()
+        atlas = Image.new("RGBA", (max(self.sizes, default=0) * len(rarities), sum(self.sizes)))
+        overlays, index = {}, []
+        top = 0
+        for size in self.sizes:
+            for column, rarity in enumerate(rarities):
+                left = column * max(self.sizes)
+                overlay = generate_rarity_gradient(rarity, size)
+                atlas.paste(overlay, (left, top))
+                overlays[(rarity, size)] = overlay
+                index.append({"rarity": rarity, "size": size, "color": list(rarities[rarity]),
+                              "box": [left, top, left + size, top + size]})
+            top += size
+        with contextlib.suppress(OSError):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            atlas.save(self.path)
+            with open(self.index_path, "w", encoding="utf-8") as file:
+                json.dump(index, file)
+        return overlays
+
+    def prepare(self):
+        """Load the overlays from disk, rendering and saving them first if needed."""
+        return self.overlays
+
+    def get(self, rarity: str, size: int = 125) -> typing.Optional[Image.Image]:
+        if rarity_utils.is_exactly(rl_utils.COMMON, rarity) or rarity_utils.is_exactly(rl_utils.UNCOMMON, rarity):
+            return None
+        key = (rarity_utils.get_repr(rarity), size)
+        overlay = self.overlays.get(key)
+        if overlay is None:
+            overlay = self.overlays[key] = generate_rarity_gradient(rarity, size)
+        return overlay
+
+
+_worker_atlas: typing.Optional[RarityOverlayAtlas] = None
+_worker_mipmaps: typing.Optional[MipmapCache] = None
+
+
+def _initialize_worker(sizes: typing.Tuple[int, ...], path: pathlib.Path, mipmap_cache_size: int):
+    global _worker_atlas, _worker_mipmaps
+    _worker_atlas = RarityOverlayAtlas(sizes, path)
+    _worker_mipmaps = MipmapCache(mipmap_cache_size)
+    DEFAULT_METRICS.reset()
+
+
+def render_tiles(tiles: typing.Sequence[typing.Tuple[str, bytes, str, int]]
+                 ) -> typing.Tuple[typing.List[typing.Union[bytes, Exception]], tuple]:
+    """Composite a batch of icons into RGBA buffers from their mipmaps, runs inside the pipeline workers.
+
+    The metrics recorded by the worker for the batch are drained and returned along with the buffers.
+    """
+    results = []
+    for key, data, rarity, size in tiles:
+        try:
+            base_image = _worker_mipmaps.get(key, data).get(size)
+            gradient = None
+            with contextlib.suppress(KeyError):
+                gradient = _worker_atlas.get(rarity, size)
+            results.append(composite_tile(base_image, size, gradient).tobytes())
+        except Exception as error:
+            results.append(error)
+    return results, DEFAULT_METRICS.drain()
+
+
+class ImagePipeline:
+    """Renders tiles in batches over worker processes, handing back RGBA images ready for ImageTk.PhotoImage.
+
+    Each icon is always rendered by the same worker, which keeps its mipmaps, so rendering it at another size
+    does not decode it again. Rendered tiles are packed in the tile atlas, if any, so later sessions read them back
+    instead of rendering.
+    """
+
+    def __init__(self, atlas: RarityOverlayAtlas, max_workers: typing.Optional[int] = None,
+                 max_batch_size: int = 16, tiles: typing.Optional[TileAtlas] = None,
+                 mipmap_cache_size: int = DEFAULT_MIPMAP_CACHE_SIZE):
+        self.atlas = atlas
+        self.tiles = tiles
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_batch_size = max_batch_size
+        self.mipmap_cache_size = mipmap_cache_size
+        self._executors: typing.Optional[typing.List[concurrent.futures.ProcessPoolExecutor]] = None
+        self._pending: typing.List[typing.Tuple[typing.Tuple[str, bytes, str, int], asyncio.Future]] = []
+
+    @property
+    def executors(self) -> typing.List[concurrent.futures.ProcessPoolExecutor]:
+        if self._executors is None:
+            self.atlas.prepare()
+            initargs = (self.atlas.sizes, self.atlas.path, self.mipmap_cache_size // self.max_workers)
+            self._executors = [concurrent.futures.ProcessPoolExecutor(1, initializer=_initialize_worker,
+                                                                      initargs=initargs)
+                               for _ in range(self.max_workers)]
+        return self._executors
+
+    async def render(self, data: bytes, rarity: str, size: int = 125) -> Image.Image:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        icon_key = get_icon_key(data)
+        if not self._pending:
+            loop.call_soon(self._flush, loop)
+        self._pending.append(((icon_key, data, rarity, size), future))
+        buffer = await future
+        if self.tiles is not None:
+            if self.tiles.put(icon_key, rarity, size, buffer):
+                return self.tiles.get(icon_key, rarity, size)
+        return Image.frombuffer("RGBA", (size, size), buffer, "raw", "RGBA", 0, 1)
+
+    def get_tile(self, icon_key: str, rarity: str, size: int = 125) -> typing.Optional[Image.Image]:
+        if self.tiles is None:
+            return None
+        return self.tiles.get(icon_key, rarity, size)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        pending, self._pending = self._pending, []
+        shards = collections.defaultdict(list)
+        for tile, future in pending:
+            shards[int(tile[0][:8], 16) % self.max_workers].append((tile, future))
+        for shard, shard_pending in shards.items():
+            for start in range(0, len(shard_pending), self.max_batch_size):
+                batch = shard_pending[start:start + self.max_batch_size]
+                batch_future = loop.run_in_executor(self.executors[shard], render_tiles, [tile for tile, _ in batch])
+                batch_future.add_done_callback(functools.partial(self._resolve, [future for _, future in batch]))
+
+    @staticmethod
+    def _resolve(futures: typing.List[asyncio.Future], batch_future: asyncio.Future):
+        results = None
+        if not batch_future.cancelled() and batch_future.exception() is None:
+            results, metrics = batch_future.result()
+            DEFAULT_METRICS.merge(metrics)
+        for index, future in enumerate(futures):
+            if future.done():
+                continue
+            if batch_future.cancelled():
+                future.cancel()
+            elif batch_future.exception() is not None:
+                future.set_exception(batch_future.exception())
+            elif isinstance(results[index], Exception):
+                future.set_exception(results[index])
+            else:
+                future.set_result(results[index])
+
+    def close(self):
+        if self._executors is not None:
+            for executor in self._executors:
+                executor.shutdown(cancel_futures=True)
+            self._executors = None
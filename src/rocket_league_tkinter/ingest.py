@@ -0,0 +1,48 @@
+import time
+import tkinter as tk
+import typing
+
+
+class ChunkedIngestion:
+    """Feeds items from an iterable to a callback in time-sliced chunks scheduled on the Tk event loop."""
+
+    def __init__(self, widget: tk.Misc, items: typing.Iterable, add: typing.Callable[[typing.List], typing.Any],
+                 time_slice: float = 0.01, on_done: typing.Optional[typing.Callable[[], typing.Any]] = None):
+        self.widget = widget
+        self.add = add
+        self.time_slice = time_slice
+        self.on_done = on_done
+        self.count = 0
+        self.done = False
+        self._iterator = iter(items)
+        self._chunk_size = 1
+        self._cancelled = False
+
+    def start(self) -> "ChunkedIngestion":
+        self.widget.after_idle(self._step)
+        return self
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _step(self):
+        if self._cancelled:
+            return
+        start_time = time.perf_counter()
+        chunk = []
+        for item in self._iterator:
+            chunk.append(item)
+            if len(chunk) >= self._chunk_size:
+                break
+        else:
+            self.done = True
+        if chunk:
+            self.add(chunk)
+            self.count += len(chunk)
+            elapsed = time.perf_counter() - start_time
+            self._chunk_size = max(1, min(len(chunk) * 4, int(len(chunk) * self.time_slice / max(elapsed, 1e-6))))
+        if self.done:
+            if self.on_done is not None:
+                self.on_done()
+        else:
+            self.widget.after(1, self._step)
@@ -0,0 +1,18 @@
+import importlib.util
+import sys
+import types
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """Import a module whose body only runs the first time one of its attributes is accessed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,172 @@
+import asyncio
+import collections
+import concurrent.futures
+import contextlib
+import functools
+import queue
+import threading
+import time
+import tkinter as tk
+import typing
+from rocket_league_tkinter.download import IconDownloader
+from rocket_league_tkinter.imaging import ImagePipeline, RarityOverlayAtlas
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+
+
+class AsyncLoader:
+    """Runs coroutines on a dedicated event loop thread and hands their results back to the Tk thread."""
+
+    def __init__(self, downloader: typing.Optional[IconDownloader] = None,
+                 pipeline: typing.Optional[ImagePipeline] = None, poll_interval: int = 15):
+        self.downloader = downloader if downloader is not None else IconDownloader()
+        self.pipeline = pipeline if pipeline is not None else ImagePipeline(RarityOverlayAtlas())
+        self.poll_interval = poll_interval
+        self._loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self._thread: typing.Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._done = queue.SimpleQueue()
+        self._pending = 0
+        self._poll_root: typing.Optional[tk.Misc] = None
+        self._poll_scheduled = False
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="AsyncLoader", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def submit(self, widget: tk.Misc, coroutine: typing.Coroutine,
+               callback: typing.Callable[[concurrent.futures.Future], typing.Any]) -> concurrent.futures.Future:
+        """Schedule the coroutine on the loader thread, callback is called with its future on the Tk thread.
+
+        Results are polled on the root window, so destroying the submitting widget does not stop the polling.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        future.add_done_callback(lambda future_: self._done.put((callback, future_)))
+        self._pending += 1
+        root = widget._root()
+        if root is not self._poll_root:
+            self._poll_root = root
+            self._poll_scheduled = False
+        self._schedule_poll()
+        return future
+
+    def _schedule_poll(self):
+        if not self._poll_scheduled:
+            with contextlib.suppress(tk.TclError):
+                self._poll_root.after(self.poll_interval, self._poll)
+                self._poll_scheduled = True
+
+    def _poll(self):
+        self._poll_scheduled = False
+        try:
+            while True:
+                try:
+                    callback, future = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                self._pending -= 1
+                callback(future)
+        finally:
+            if self._pending > 0:
+                self._schedule_poll()
+
+    def close(self):
+        if self._thread is not None and self._thread.is_alive():
+            asyncio.run_coroutine_threadsafe(self.downloader.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+        self.pipeline.close()
+
+
+class PrefetchScheduler:
+    """Loads the tiles of a scrolling grid, visible rows first and then the next rows in the scroll direction.
+
+    Loads of tiles that scrolled away before finishing are cancelled. Tiles whose load failed are not loaded again
+    before a backoff of failure_backoff seconds, doubled on each failure up to max_failure_backoff.
+    """
+
+    def __init__(self, widget: tk.Misc, loader: AsyncLoader, load: typing.Callable[[typing.Any], typing.Coroutine],
+                 on_loaded: typing.Callable[[typing.Any, concurrent.futures.Future], typing.Any],
+                 on_idle: typing.Optional[typing.Callable[[], typing.Any]] = None, columns: int = 7,
+                 prefetch_rows: int = 2, max_in_flight: int = 16, failure_backoff: float = 5,
+                 max_failure_backoff: float = 300):
+        self.widget = widget
+        self.loader = loader
+        self.load = load
+        self.on_loaded = on_loaded
+        self.on_idle = on_idle
+        self.columns = columns
+        self.prefetch_rows = prefetch_rows
+        self.max_in_flight = max_in_flight
+        self.failure_backoff = failure_backoff
+        self.max_failure_backoff = max_failure_backoff
+        self._failures: typing.Dict[typing.Any, typing.Tuple[int, float]] = {}
+        self._queue = collections.deque()
+        self._in_flight: typing.Dict[typing.Any, concurrent.futures.Future] = {}
+        self._first_row = 0
+
+    def is_idle(self) -> bool:
+        return not self._queue and not self._in_flight
+
+    def is_backing_off(self, item) -> bool:
+        failure = self._failures.get(item)
+        return failure is not None and time.monotonic() < failure[1]
+
+    def update(self, items: typing.Sequence, first_row: int, last_row: int,
+               needs_load: typing.Callable[[typing.Any], bool]):
+        """Reprioritize loads for the items of the rows between first_row and last_row, inclusive."""
+        rows = list(range(first_row, last_row + 1))
+        if first_row < self._first_row:
+            rows.extend(range(first_row - 1, first_row - 1 - self.prefetch_rows, -1))
+        else:
+            rows.extend(range(last_row + 1, last_row + 1 + self.prefetch_rows))
+        self._first_row = first_row
+        wanted = []
+        for row in rows:
+            if row >= 0:
+                wanted.extend(item for item in items[row * self.columns:(row + 1) * self.columns]
+                              if needs_load(item) and not self.is_backing_off(item))
+        wanted_set = set(wanted)
+        for item in tuple(self._in_flight):
+            if item not in wanted_set:
+                self._in_flight.pop(item).cancel()
+        self._queue = collections.deque(item for item in wanted if item not in self._in_flight)
+        self._pump()
+
+    def cancel(self):
+        self._queue.clear()
+        for future in self._in_flight.values():
+            future.cancel()
+        self._in_flight.clear()
+
+    def _pump(self):
+        while self._queue and len(self._in_flight) < self.max_in_flight:
+            item = self._queue.popleft()
+            self._in_flight[item] = self.loader.submit(self.widget, self.load(item),
+                                                       functools.partial(self._on_done, item))
+
+    def _on_done(self, item, future: concurrent.futures.Future):
+        if self._in_flight.get(item) is future:
+            del self._in_flight[item]
+        if not self.widget.winfo_exists():
+            return
+        try:
+            if not future.cancelled() and future.exception() is not None:
+                self._on_failed(item)
+            elif not future.cancelled():
+                self._failures.pop(item, None)
+                self.on_loaded(item, future)
+        finally:
+            self._pump()
+            if self.is_idle() and self.on_idle is not None:
+                self.on_idle()
+
+    def _on_failed(self, item):
+        DEFAULT_METRICS.count("load_failures")
+        failures = self._failures.get(item, (0, 0.0))[0] + 1
+        backoff = min(self.max_failure_backoff, self.failure_backoff * 2 ** (failures - 1))
+        self._failures[item] = (failures, time.monotonic() + backoff)
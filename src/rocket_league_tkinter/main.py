@@ -1,54 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+import collections
 import contextlib
 import functools
-import aiohttp
 import datetime
-import io
-import tempfile
+import itertools
+import math
 import tkinter as tk
 import typing
 import pathlib
-import asyncio
+import concurrent.futures
 from tkinter import ttk
-from PIL import Image, ImageTk
 import rocket_league_utils as rl_utils
 from rocket_league_utils import rarity_utils, color_utils, certified_utils, slot_utils, constants
-import rocket_league_gameflip_api as rl_gameflip_api
-
-
-def resize_image(photo, size: int = 125):
-    return photo.resize((size, size))
-
-
-async def get_image(url: str, size: int = 125):
-    start_time = datetime.datetime.now()
-    print(f"Creating image {url} at {start_time}")
-    downloaded = 0
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, timeout=1) as response:
-            buffer = tempfile.SpooledTemporaryFile()
-            async for chunk in response.content.iter_chunked(1024):
-                downloaded += len(chunk)
-                buffer.write(chunk)
-            buffer.seek(0)
-            image = Image.open(io.BytesIO(buffer.read()))
-    finish_time = datetime.datetime.now()
-    print(f"Created image {url} in {finish_time - start_time}")
-    return resize_image(image, size)
-
-
-def generate_gradient(color_1: tuple[int, int, int, int], color_2: tuple[int, int, int, int], width: int,
-                      height: int) -> Image:
-    """Generate a vertical gradient."""
-    base = Image.new('RGBA', (width, height), color_1)
-    top = Image.new('RGBA', (width, height), color_2)
-    mask = Image.new('L', (width, height))
-    mask_data = []
-    for y in range(height):
-        for x in range(width):
-            mask_data.append(int(255 * (y / height)))
-    mask.putdata(mask_data)
-    base.paste(top, (0, 0), mask)
-    return base
+from rocket_league_tkinter.autocomplete import PrefixTrie
+from rocket_league_tkinter.batch import DEFAULT_CANVAS_BATCH, CanvasBatch, Command, run_commands
+from rocket_league_tkinter.cache import IconCache
+from rocket_league_tkinter.catalog import CatalogIndex
+from rocket_league_tkinter.download import IconDownloader
+from rocket_league_tkinter.filters import FilterIndex, SortIndex
+from rocket_league_tkinter.imaging import ImagePipeline, MipmapCache, RarityOverlayAtlas, composite_tile, get_icon_key
+from rocket_league_tkinter.ingest import ChunkedIngestion
+from rocket_league_tkinter.lazy import lazy_import
+from rocket_league_tkinter.loader import AsyncLoader, PrefetchScheduler
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+from rocket_league_tkinter.prices import PriceService
+from rocket_league_tkinter.residency import ResidencyManager
+from rocket_league_tkinter.store import InventoryStore, ItemRecord
+from rocket_league_tkinter.tiles import TileAtlas
+
+Image = lazy_import("PIL.Image")
+ImageTk = lazy_import("PIL.ImageTk")
+rl_gameflip_api = lazy_import("rocket_league_gameflip_api")
+aiohttp = lazy_import("aiohttp")
+
+DEFAULT_ICON_CACHE = IconCache()
+DEFAULT_CATALOG_INDEX = CatalogIndex()
+DEFAULT_ICON_DOWNLOADER = IconDownloader(DEFAULT_ICON_CACHE)
+DEFAULT_TILE_ATLAS = TileAtlas()
+DEFAULT_MIPMAP_CACHE = MipmapCache()
+
+
+@functools.lru_cache
+def get_rarity_rank(rarity: str) -> int:
+    for rank, rarity_ in enumerate(rl_utils.RARITIES):
+        if rarity_utils.is_exactly(rarity_, rarity):
+            return rank
+    return len(rl_utils.RARITIES)
+
+
+async def get_image(url: str, size: int = 125, downloader: IconDownloader = DEFAULT_ICON_DOWNLOADER,
+                    mipmaps: MipmapCache = DEFAULT_MIPMAP_CACHE):
+    with DEFAULT_METRICS.timer("download"):
+        data = await downloader.download(url)
+    return mipmaps.get(get_icon_key(data), data).get(size)
 
 
 class ScrollableFrame(ttk.Frame):
@@ -58,23 +64,43 @@ class ScrollableFrame(ttk.Frame):
         self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.canvas.yview)
         super().__init__(self.canvas, height=height, width=width)
         self.bind("<Configure>", lambda _: self.canvas.configure(scrollregion=self.canvas.bbox(tk.ALL)))
-        self.canvas.create_window((0, 0), window=self, anchor=tk.NW)
+        self.window = self.canvas.create_window((0, 0), window=self, anchor=tk.NW)
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
 
+NOT_FOUND_TEXT = "Imagem não encontrada."
+
+
 class ItemImageStyle:
     def __init__(self, size: int = 125, font: str = "Segoe"):
         self.size = size
         self.font = (font, int(size * 0.07))
 
+    @property
+    def layout(self) -> typing.Dict[str, typing.Tuple[float, float, str]]:
+        """Position and anchor of the canvas items of a tile, by tag."""
+        size = self.size
+        return {"name": (size / 2, int(size * 0.1), tk.CENTER), "price": (size / 2, int(size * 0.2), tk.CENTER),
+                "color": (size / 2, int(size * 0.8), tk.CENTER), "certified": (size / 2, int(size * 0.9), tk.CENTER),
+                "quantity": (int(size * 0.95), int(size * 0.05), tk.NE), "trade_lock": (5, 5, tk.NW),
+                "notfound": (size / 2, size / 2, tk.CENTER)}
+
+    @property
+    def trade_lock_size(self) -> int:
+        return int(self.size * 0.15)
+
 
 DEFAULT_ITEM_IMAGE_STYLE = ItemImageStyle()
+PREVIEW_ITEM_IMAGE_STYLE = ItemImageStyle(size=256)
+DEFAULT_OVERLAY_ATLAS = RarityOverlayAtlas((DEFAULT_ITEM_IMAGE_STYLE.size, PREVIEW_ITEM_IMAGE_STYLE.size))
+DEFAULT_ASYNC_LOADER = AsyncLoader(DEFAULT_ICON_DOWNLOADER,
+                                   ImagePipeline(DEFAULT_OVERLAY_ATLAS, tiles=DEFAULT_TILE_ATLAS))
 
 
 class ShowItem(tk.Canvas, rl_utils.Item):
-    trade_lock_image = Image.open(str(pathlib.Path(__file__).parent) + r"\source\tradelock.png")
+    trade_lock_image_path = str(pathlib.Path(__file__).parent / "source" / "tradelock.png")
 
     def __init__(self, master: typing.Union[tk.Widget, tk.Tk, tk.Toplevel],
                  gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI,
@@ -84,41 +110,106 @@ class ShowItem(tk.Canvas, rl_utils.Item):
                  archived: bool = False,
                  color: str = constants.DEFAULT, certified: str = constants.NONE,
                  style: ItemImageStyle = DEFAULT_ITEM_IMAGE_STYLE,
-                 base_image: typing.Optional[Image.Image] = None):
+                 base_image: typing.Optional[Image.Image] = None, batch: CanvasBatch = DEFAULT_CANVAS_BATCH):
         self._gradient = None
         self._base_image = base_image
         self._processed_image = None
+        self._rarity = None
+        self._color = None
+        self._state = "normal"
+        self._pending: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        self._batch = batch
         self.style = style
         self._gameflip_api = gameflip_api
         self.loaded_image = False
-        trade_lock_size = int(style.size * 0.15)
-        trade_lock_image = self.trade_lock_image.resize((trade_lock_size, trade_lock_size))
-        self._trade_lock_image = ImageTk.PhotoImage(trade_lock_image)
+        self._trade_lock_image = self.get_trade_lock_photo(style.trade_lock_size)
         super().__init__(master, width=style.size, height=style.size)
-        self.create_rectangle(0, 0, self.style.size, self.style.size, fill="black")
-        self.create_image(0, 0, anchor=tk.NW, tags="image")
-        self.create_text(style.size / 2, int(style.size * 0.1), font=style.font, fill="white", justify=tk.CENTER,
-                         tags=("name", "attribute"))
-        self.create_text(style.size / 2, int(style.size * 0.8), font=style.font, tags=("color", "attribute"))
-        self.create_text(style.size / 2, int(style.size * 0.9), font=style.font, fill="white",
-                         tags=("certified", "attribute"))
-        self.create_text(int(style.size * 0.95), int(style.size * 0.05), anchor=tk.NE, font=style.font, fill="white",
-                         tags=("quantity", "attribute"))
-        self.create_image(5, 5, anchor=tk.NW, image=self._trade_lock_image, tags=("trade_lock", "attribute"))
-        self.create_text(style.size / 2, style.size / 2, width=style.size, text="Imagem não encontrada.",
-                         justify=tk.CENTER, tags="notfound", fill="white")
+        run_commands(self, self.get_create_commands())
         rl_utils.Item.__init__(self, name, slot, rarity, quantity, blueprint, serie, trade_lock, platform, acquired,
                                favorite, archived, color, certified)
 
+    def get_create_commands(self) -> typing.List[Command]:
+        path, size, font, layout = str(self), self.style.size, self.style.font, self.style.layout
+        return [(path, "create", "rectangle", 0, 0, size, size, "-fill", "black"),
+                (path, "create", "image", 0, 0, "-anchor", tk.NW, "-tags", "image"),
+                (path, "create", "text", *layout["name"][:2], "-font", font, "-fill", "white", "-justify",
+                 tk.CENTER, "-tags", ("name", "attribute")),
+                (path, "create", "text", *layout["color"][:2], "-font", font, "-tags", ("color", "attribute")),
+                (path, "create", "text", *layout["certified"][:2], "-font", font, "-fill", "white", "-tags",
+                 ("certified", "attribute")),
+                (path, "create", "text", *layout["quantity"][:2], "-anchor", layout["quantity"][2], "-font", font,
+                 "-fill", "white", "-tags", ("quantity", "attribute")),
+                (path, "create", "image", *layout["trade_lock"][:2], "-anchor", layout["trade_lock"][2], "-image",
+                 str(self._trade_lock_image), "-tags", ("trade_lock", "attribute")),
+                (path, "create", "text", *layout["notfound"][:2], "-width", size, "-text", NOT_FOUND_TEXT,
+                 "-justify", tk.CENTER, "-tags", "notfound", "-fill", "white")]
+
+    @classmethod
+    @functools.lru_cache
+    def get_trade_lock_image(cls, size: int) -> Image.Image:
+        return Image.open(cls.trade_lock_image_path).resize((size, size))
+
+    @classmethod
+    @functools.lru_cache
+    def get_trade_lock_photo(cls, size: int) -> ImageTk.PhotoImage:
+        return ImageTk.PhotoImage(cls.get_trade_lock_image(size))
+
+    def configure_item(self, tag: str, **options):
+        """Queue options for the canvas items with the tag, applied with every other pending change on idle."""
+        pending = self._pending.pop(tag, {})
+        pending.update(options)
+        self._pending[tag] = pending
+        self._batch.mark(self)
+
+    def destroy(self):
+        self._pending = {}
+        super().destroy()
+
+    def get_render_commands(self) -> typing.List[Command]:
+        pending, self._pending = self._pending, {}
+        path = str(self)
+        return [(path, "itemconfigure", tag) + tuple(itertools.chain.from_iterable(
+            (f"-{option}", value) for option, value in options.items())) for tag, options in pending.items()]
+
+    @staticmethod
+    def get_name_options(name: str) -> typing.Dict[str, typing.Any]:
+        return {"text": name, "state": tk.NORMAL}
+
+    @staticmethod
+    def get_certified_options(certified: str) -> typing.Dict[str, typing.Any]:
+        if certified_utils.is_exactly(rl_utils.NONE, certified):
+            return {"state": tk.HIDDEN}
+        return {"text": certified, "state": tk.NORMAL}
+
+    @staticmethod
+    def get_quantity_options(quantity: int) -> typing.Dict[str, typing.Any]:
+        return {"text": str(quantity), "state": tk.NORMAL if quantity > 1 else tk.HIDDEN}
+
+    @staticmethod
+    def get_trade_lock_options(trade_lock: bool) -> typing.Dict[str, typing.Any]:
+        return {"state": tk.NORMAL if trade_lock else tk.HIDDEN}
+
+    @staticmethod
+    def get_color_options(color: str) -> typing.Dict[str, typing.Any]:
+        if color_utils.is_exactly(rl_utils.DEFAULT, color):
+            return {"state": tk.HIDDEN}
+        return {"state": tk.NORMAL, "fill": rl_utils.HEX_TABLE[rl_utils.color_utils.get_repr(color)], "text": color}
+
+    @classmethod
+    def get_attribute_options(cls, item: rl_utils.Item) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        """Options of the attribute canvas items showing the item, by tag, as the setters configure them."""
+        return {"name": cls.get_name_options(item.name), "color": cls.get_color_options(item.color),
+                "certified": cls.get_certified_options(item.certified),
+                "quantity": cls.get_quantity_options(item.quantity),
+                "trade_lock": cls.get_trade_lock_options(item.trade_lock)}
+
     @property
     def rarity(self):
         return self._rarity
 
     @rarity.setter
     def rarity(self, rarity: str):
-        if "_rarity" in dir(self) and rarity_utils.compare(self._rarity, rarity):
-            pass
-        else:
+        if self._rarity is None or not rarity_utils.compare(self._rarity, rarity):
             with contextlib.suppress(KeyError):
                 self._gradient = self.generate_gradient_by_rarity(rarity, self.style.size)
         self._rarity = rarity
@@ -129,10 +220,7 @@ class ShowItem(tk.Canvas, rl_utils.Item):
 
     @certified.setter
     def certified(self, certified: str):
-        if certified_utils.is_exactly(rl_utils.NONE, certified):
-            self.itemconfigure("certified", state=tk.HIDDEN)
-        else:
-            self.itemconfigure("certified", text=certified, state=tk.NORMAL)
+        self.configure_item("certified", **self.get_certified_options(certified))
         self._certified = certified
 
     @property
@@ -141,7 +229,7 @@ class ShowItem(tk.Canvas, rl_utils.Item):
 
     @quantity.setter
     def quantity(self, quantity: int):
-        self.itemconfigure("quantity", text=str(quantity), state=tk.NORMAL if quantity > 1 else tk.HIDDEN)
+        self.configure_item("quantity", **self.get_quantity_options(quantity))
         self._quantity = quantity
 
     @property
@@ -150,7 +238,7 @@ class ShowItem(tk.Canvas, rl_utils.Item):
 
     @trade_lock.setter
     def trade_lock(self, trade_lock: bool):
-        self.itemconfigure("trade_lock", state=tk.NORMAL if trade_lock else tk.HIDDEN)
+        self.configure_item("trade_lock", **self.get_trade_lock_options(trade_lock))
         self._trade_lock = trade_lock
 
     @property
@@ -159,14 +247,8 @@ class ShowItem(tk.Canvas, rl_utils.Item):
 
     @color.setter
     def color(self, color: str):
-        if "_color" in dir(self) and color_utils.compare(color, self.color):
-            pass
-        else:
-            if color_utils.is_exactly(rl_utils.DEFAULT, color):
-                self.itemconfigure("color", state=tk.HIDDEN)
-            else:
-                hex_code = rl_utils.HEX_TABLE[rl_utils.color_utils.get_repr(color)]
-                self.itemconfigure("color", state=tk.NORMAL, fill=hex_code, text=color)
+        if self._color is None or not color_utils.compare(color, self._color):
+            self.configure_item("color", **self.get_color_options(color))
         self._color = color
 
     @property
@@ -175,68 +257,110 @@ class ShowItem(tk.Canvas, rl_utils.Item):
 
     @name.setter
     def name(self, name: str):
-        self.itemconfigure("name", text=name, state=tk.NORMAL)
+        self.configure_item("name", **self.get_name_options(name))
         self._name = name
 
-    def update_image(self, base_image=None):
+    def update_image(self, base_image=None, loader: AsyncLoader = DEFAULT_ASYNC_LOADER):
         if base_image:
             self._base_image = base_image
+            self.show_rendered_image(self.process_image(self._base_image, self.name, self.style.size,
+                                                        self._gradient))
         else:
-            self._base_image = asyncio.run(self.get_photo(self, self._gameflip_api, self.style.size))
+            loader.submit(self, self.get_rendered_photo(self, self._gameflip_api, self.style.size, loader),
+                          self._on_photo_loaded)
+
+    def show_rendered_image(self, image: Image.Image):
         self.set_state("normal")
-        self._processed_image = ImageTk.PhotoImage(self.process_image(self._base_image, self.name, self.style.size,
-                                                                      self._gradient))
-        self.itemconfigure("image", image=self._processed_image)
+        with DEFAULT_METRICS.timer("photo_image"):
+            self._processed_image = ImageTk.PhotoImage(image)
+        self.configure_item("image", image=str(self._processed_image))
+
+    def _on_photo_loaded(self, future: concurrent.futures.Future):
+        try:
+            self.show_rendered_image(future.result())
+        except rl_utils.ItemNotFound:
+            self.set_state("notfound")
 
     def set_state(self, state: typing.Literal["notfound", "normal"]):
+        self._state = state
         if state == "normal":
-            self.itemconfigure("attribute", state=tk.NORMAL)
-            self.itemconfigure("image", state=tk.NORMAL)
-            self.itemconfigure("notfound", state=tk.HIDDEN)
+            self.configure_item("attribute", state=tk.NORMAL)
+            self.configure_item("image", state=tk.NORMAL)
+            self.configure_item("notfound", state=tk.HIDDEN)
         else:
-            self.itemconfigure("attribute", state=tk.HIDDEN)
-            self.itemconfigure("image", state=tk.HIDDEN)
-            self.itemconfigure("notfound", state=tk.NORMAL)
+            self.configure_item("attribute", state=tk.HIDDEN)
+            self.configure_item("image", state=tk.HIDDEN)
+            self.configure_item("notfound", state=tk.NORMAL)
+
+    def clear_image(self):
+        self._base_image = None
+        self._processed_image = None
+        self.configure_item("image", image="")
+        self.set_state("normal")
+
+    def assign(self, item: rl_utils.Item):
+        rl_utils.Item.__init__(self, item.name, item.slot, item.rarity, item.quantity, item.blueprint, item.serie,
+                               item.trade_lock, item.platform, item.acquired, item.favorite, item.archived,
+                               item.color, item.certified)
 
     def get_state(self) -> typing.Literal["notfound", "normal"]:
-        if self.itemcget("image", "state") == tk.NORMAL:
-            return "normal"
-        else:
-            return "notfound"
+        return self._state
 
     @staticmethod
-    async def get_photo(item: rl_utils.ReprItem,
-                        gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI, size: int = 125):
+    def search_photo_url(item: rl_utils.ReprItem, gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI) -> str:
         data_item = gameflip_api.get_data_item(item)
         if isinstance(data_item, rl_gameflip_api.ColorfulDataItem):
-            item_url = data_item.get_full_icon_url(data_item.get_icon_by_color(item.color))
+            return data_item.get_full_icon_url(data_item.get_icon_by_color(item.color))
         else:
-            item_url = data_item.get_full_icon_url(data_item.icon)
-        return await get_image(item_url, size)
+            return data_item.get_full_icon_url(data_item.icon)
+
+    @staticmethod
+    def get_photo_url(item: rl_utils.ReprItem, gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI,
+                      catalog: CatalogIndex = DEFAULT_CATALOG_INDEX) -> str:
+        if isinstance(item, ItemRecord) and item.icon_url is not None:
+            return item.icon_url
+        url = catalog.resolve(item, functools.partial(ShowItem.search_photo_url, gameflip_api=gameflip_api))
+        if isinstance(item, ItemRecord):
+            item.icon_url = url
+        return url
+
+    @staticmethod
+    async def resolve_photo_url(item: rl_utils.ReprItem, gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI,
+                                catalog: CatalogIndex = DEFAULT_CATALOG_INDEX) -> str:
+        """Return the icon url like get_photo_url, searching the catalog in a worker thread if it is not indexed."""
+        if (isinstance(item, ItemRecord) and item.icon_url is not None) or catalog.is_indexed(item):
+            return ShowItem.get_photo_url(item, gameflip_api, catalog)
+        return await asyncio.to_thread(ShowItem.get_photo_url, item, gameflip_api, catalog)
+
+    @staticmethod
+    async def get_photo(item: rl_utils.ReprItem,
+                        gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI, size: int = 125,
+                        downloader: IconDownloader = DEFAULT_ICON_DOWNLOADER):
+        return await get_image(await ShowItem.resolve_photo_url(item, gameflip_api), size, downloader)
+
+    @staticmethod
+    async def get_rendered_photo(item: rl_utils.ReprItem,
+                                 gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI, size: int = 125,
+                                 loader: AsyncLoader = DEFAULT_ASYNC_LOADER) -> Image.Image:
+        url = await ShowItem.resolve_photo_url(item, gameflip_api)
+        entry = loader.downloader.cache.lookup(url)
+        if entry is not None:
+            tile = loader.pipeline.get_tile(entry.key, item.rarity, size)
+            if tile is not None:
+                return tile
+        with DEFAULT_METRICS.timer("download"):
+            data = await loader.downloader.download(url)
+        with DEFAULT_METRICS.timer("render"):
+            return await loader.pipeline.render(data, item.rarity, size)
 
     @staticmethod
-    @functools.lru_cache
     def generate_gradient_by_rarity(rarity: str, size: int = 125):
-        if rarity_utils.is_exactly(rl_utils.COMMON, rarity) or rarity_utils.is_exactly(rl_utils.UNCOMMON, rarity):
-            return None
-        else:
-            rarity = rarity_utils.get_repr(rarity)
-            base = rl_utils.RGB_TABLE[rarity] + (0,)
-            top = rl_utils.RGB_TABLE[rarity] + (80,)
-            return generate_gradient(base, top, size, size)
+        return DEFAULT_OVERLAY_ATLAS.get(rarity, size)
 
     @staticmethod
     def process_image(base_image: Image.Image, name: str, size: int = 125, gradient=None):
-        start_time = datetime.datetime.now()
-        print(f"Processing item {name} image.")
-        image = Image.new("RGB", (size, size), (0, 0, 0))
-        image.paste(base_image)
-        image = image.convert("RGBA")
-        if gradient is not None:
-            image = Image.alpha_composite(image, gradient)
-        finish_time = datetime.datetime.now()
-        print(f"Processed item {name} image in {finish_time - start_time}.")
-        return image
+        with DEFAULT_METRICS.timer("process"):
+            return composite_tile(base_image, size, gradient)
 
 
 class Item(ShowItem):
@@ -249,13 +373,19 @@ class Item(ShowItem):
                  color: str = constants.DEFAULT, certified: str = constants.NONE,
                  style: ItemImageStyle = DEFAULT_ITEM_IMAGE_STYLE,
                  base_image: typing.Optional[Image.Image] = None):
+        self._selected = False
         super().__init__(master, gameflip_api, name, slot, rarity, quantity, blueprint, serie, trade_lock, platform,
                          acquired, favorite, archived, color, certified, style, base_image)
-        self._outline = self.create_rectangle(3, 3, style.size - 3 + 1, style.size - 3 + 1, width=3, outline="")
         self.bind("<Button-1>", lambda event: self._on_click())
         self.bind("<Enter>", lambda event: self._on_enter())
         self.bind("<Leave>", lambda event: self._on_leave())
 
+    def get_create_commands(self) -> typing.List[Command]:
+        size = self.style.size
+        return super().get_create_commands() + [
+            (str(self), "create", "rectangle", 3, 3, size - 3 + 1, size - 3 + 1, "-width", 3, "-outline", "",
+             "-tags", "outline")]
+
     def _on_click(self):
         if self.is_selected():
             self.unselect()
@@ -263,28 +393,30 @@ class Item(ShowItem):
             self.select()
 
     def select(self):
-        self.itemconfigure(self._outline, outline="#00A3F5")
+        self._selected = True
+        self.configure_item("outline", outline="#00A3F5")
 
     def unselect(self):
-        self.itemconfigure(self._outline, outline="")
+        self._selected = False
+        self.configure_item("outline", outline="")
 
     def is_selected(self) -> bool:
-        return self.itemcget(self._outline, "outline") == "#00A3F5"
+        return self._selected
 
     def _on_leave(self):
         if not self.is_selected():
-            self.itemconfigure(self._outline, outline="")
+            self.configure_item("outline", outline="")
 
     def _on_enter(self):
         if not self.is_selected():
-            self.itemconfigure(self._outline, outline="#85D6FF")
+            self.configure_item("outline", outline="#85D6FF")
 
 
 class ItemWithPrice(Item, rl_utils.ItemWithPrice):
     def __init__(self, master: typing.Union[tk.Widget, tk.Tk, tk.Toplevel],
                  gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI,
                  name: str, slot: str, rarity: str, quantity: int, blueprint: bool, platform: str,
-                 price: typing.Tuple[int, int], crafting_cost: int, serie: str, trade_lock: bool,
+                 price: typing.Optional[typing.Tuple[int, int]], crafting_cost: int, serie: str, trade_lock: bool,
                  acquired: datetime.datetime, favorite: bool = False, archived: bool = False,
                  color: str = constants.DEFAULT, certified: str = constants.NONE,
                  style: ItemImageStyle = DEFAULT_ITEM_IMAGE_STYLE,
@@ -293,29 +425,65 @@ class ItemWithPrice(Item, rl_utils.ItemWithPrice):
                          acquired, favorite, archived, color, certified, style, base_image)
         rl_utils.ItemWithPrice.__init__(self, name, slot, rarity, quantity, blueprint, platform, price, crafting_cost,
                                         serie, trade_lock, acquired, favorite, archived, color, certified)
-        self.create_text(style.size / 2, int(style.size * 0.2), font=style.font, fill="white", tags="price")
+
+    def get_create_commands(self) -> typing.List[Command]:
+        return super().get_create_commands() + [
+            (str(self), "create", "text", *self.style.layout["price"][:2], "-font", self.style.font, "-fill",
+             "white", "-tags", "price")]
 
     @property
     def price(self):
         return self._price
 
     @price.setter
-    def price(self, price: typing.Tuple[int, int]):
-        self.itemconfigure("price", text=f"{price[0]} - {price[1]}")
+    def price(self, price: typing.Optional[typing.Tuple[int, int]]):
+        self.configure_item("price", **self.get_price_options(price))
         self._price = price
 
+    @staticmethod
+    def get_price_options(price: typing.Optional[typing.Tuple[int, int]]) -> typing.Dict[str, typing.Any]:
+        return {"text": "" if price is None else f"{price[0]} - {price[1]}"}
+
+    @classmethod
+    def get_attribute_options(cls, item: rl_utils.Item) -> typing.Dict[str, typing.Dict[str, typing.Any]]:
+        return {**super().get_attribute_options(item), "price": cls.get_price_options(getattr(item, "price", None))}
+
 
 class ItemWindow(tk.Toplevel):
-    def __init__(self, title: str, gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI):
+    """Item editor with a preview, completing names from names, or from the catalog index names by default.
+
+    load_names returns the names of the full item catalog. It runs once in a worker thread, and its names are added to
+    the completions and kept in the catalog index, so later windows complete them without loading them again.
+    """
+
+    def __init__(self, title: str, gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI,
+                 loader: AsyncLoader = DEFAULT_ASYNC_LOADER, names: typing.Optional[typing.Iterable[str]] = None,
+                 preview_delay: int = 300, max_previews: int = 64, max_suggestions: int = 20,
+                 load_names: typing.Optional[typing.Callable[[], typing.Iterable[str]]] = None):
         super().__init__()
         self.title(title)
         self.resizable(False, False)
-        self.item_preview_style = ItemImageStyle(size=256)
+        self.gameflip_api = gameflip_api
+        self.loader = loader
+        self.preview_delay = preview_delay
+        self.max_previews = max_previews
+        self.max_suggestions = max_suggestions
+        self.completions = {"name": PrefixTrie(names if names is not None else DEFAULT_CATALOG_INDEX.names),
+                            "color": PrefixTrie(rl_utils.COLORS), "slot": PrefixTrie(rl_utils.SLOTS),
+                            "rarity": PrefixTrie(rl_utils.RARITIES), "certified": PrefixTrie(rl_utils.CERTIFICATES),
+                            "serie": PrefixTrie(rl_utils.SERIES)}
+        if load_names is not None:
+            self.loader.submit(self, asyncio.to_thread(lambda: list(load_names())), self._on_names_loaded)
+        self._previews: collections.OrderedDict[typing.Tuple[str, str, str], typing.Optional[Image.Image]] = \
+            collections.OrderedDict()
+        self._preview_after: typing.Optional[str] = None
+        self._preview_future: typing.Optional[concurrent.futures.Future] = None
+        self.item_preview_style = PREVIEW_ITEM_IMAGE_STYLE
         self.item_preview = ShowItem(self, gameflip_api, "", "", "", 1, False, "", False, rl_utils.PC,
                                      datetime.datetime.now(), style=self.item_preview_style)
         self.item_preview.grid(row=0, column=0, columnspan=3)
         ttk.Label(self, text="Name").grid(row=1, column=0, sticky=tk.W)
-        ttk.Entry(self, name="name", width=28).grid(row=2, column=0)
+        ttk.Combobox(self, name="name", width=25).grid(row=2, column=0)
         self.blueprint_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(self, name="blueprint", text="Blueprint", variable=self.blueprint_var).grid(row=1, column=1,
                                                                                                     rowspan=2)
@@ -334,7 +502,7 @@ class ItemWindow(tk.Toplevel):
         ttk.Combobox(self, name="serie", values=rl_utils.SERIES, width=25).grid(row=6, column=1)
         ttk.Button(self, name="reset", text="Redefinir", command=self.reset).grid(row=7, column=0)
         ttk.Button(self, name="confirm", text="Confirmar").grid(row=7, column=1)
-        ttk.Button(self, name="refresh_image", text="Atualizar Imagem", command=self.item_preview.update_image).grid(
+        ttk.Button(self, name="refresh_image", text="Atualizar Imagem", command=self.refresh_preview).grid(
             row=7, column=2)
         tk.Label(self, text="Quantity").grid(row=5, column=2, sticky=tk.W)
         ttk.Spinbox(self, name="quantity", from_=0, increment=1, to=1000000000,
@@ -347,13 +515,94 @@ class ItemWindow(tk.Toplevel):
         self.configure(padx=25, pady=25)
         for entry_name in ("name",  "color", "slot", "rarity", "certified", "serie"):
             self.children[entry_name].bind("<FocusOut>", self._on_attribute_change)
+            self.children[entry_name].bind("<KeyRelease>", self._on_key_release)
+            self.children[entry_name].bind("<<ComboboxSelected>>", self._on_attribute_change)
         for entry_name in ("blueprint", "trade_lock"):
             self.children[entry_name].bind("<FocusOut>", self._on_bool_attribute_change)
         self.children["quantity"].bind("<FocusOut>", self._on_quantity_change)
         self.reset()
 
+    def _on_names_loaded(self, future: concurrent.futures.Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        names = future.result()
+        DEFAULT_CATALOG_INDEX.add_names(names)
+        for name in names:
+            self.completions["name"].add(name)
+
     def _on_attribute_change(self, event):
         setattr(self.item_preview, event.widget.winfo_name(), event.widget.get())
+        if event.widget.winfo_name() in ("name", "color", "rarity"):
+            self.schedule_preview()
+
+    def _on_key_release(self, event):
+        entry_name = event.widget.winfo_name()
+        text = event.widget.get()
+        event.widget.configure(values=self.completions[entry_name].complete(text, self.max_suggestions))
+        if entry_name == "name":
+            self._on_attribute_change(event)
+        elif (value := self.completions[entry_name].find(text)) is not None:
+            setattr(self.item_preview, entry_name, value)
+            if entry_name in ("color", "rarity"):
+                self.schedule_preview()
+
+    def schedule_preview(self):
+        """Refresh the preview once the fields stop changing for preview_delay milliseconds."""
+        if self._preview_after is not None:
+            self.after_cancel(self._preview_after)
+        self._preview_after = self.after(self.preview_delay, self.refresh_preview)
+
+    def get_preview_key(self) -> typing.Tuple[str, str, str]:
+        return tuple(" ".join(value.casefold().split())
+                     for value in (self.item_preview.name, self.item_preview.color, self.item_preview.rarity))
+
+    def refresh_preview(self):
+        """Show the preview of the current fields, cancelling the lookup of a previous preview.
+
+        Previews are rendered by the image pipeline, whose worker already holds the mipmaps of the icons in the grid.
+        """
+        if self._preview_after is not None:
+            self.after_cancel(self._preview_after)
+            self._preview_after = None
+        if self._preview_future is not None:
+            self._preview_future.cancel()
+            self._preview_future = None
+        key = self.get_preview_key()
+        if not key[0]:
+            self.item_preview.clear_image()
+        elif key in self._previews:
+            self._previews.move_to_end(key)
+            self._show_preview(self._previews[key])
+        else:
+            item = ItemRecord.from_item(self.item_preview)
+            self._preview_future = self.loader.submit(
+                self, ShowItem.get_rendered_photo(item, self.gameflip_api, self.item_preview_style.size, self.loader),
+                functools.partial(self._on_preview_loaded, key))
+
+    def _on_preview_loaded(self, key: typing.Tuple[str, str, str], future: concurrent.futures.Future):
+        if future.cancelled():
+            return
+        if future is self._preview_future:
+            self._preview_future = None
+        try:
+            image = future.result()
+        except rl_utils.ItemNotFound:
+            image = None
+        except (asyncio.TimeoutError, aiohttp.ClientError, OSError):
+            if key == self.get_preview_key():
+                self._show_preview(None)
+            return
+        self._previews[key] = image
+        while len(self._previews) > self.max_previews:
+            self._previews.popitem(last=False)
+        if key == self.get_preview_key():
+            self._show_preview(image)
+
+    def _show_preview(self, image: typing.Optional[Image.Image]):
+        if image is None:
+            self.item_preview.set_state("notfound")
+        else:
+            self.item_preview.show_rendered_image(image)
 
     def _on_bool_attribute_change(self, event):
         setattr(self.item_preview, event.widget.winfo_name(), 'selected' in event.widget.state())
@@ -373,77 +622,340 @@ class ItemWindow(tk.Toplevel):
 
 
 class Slots(ScrollableFrame):
-    def __init__(self, master, gameflip_api, columns: int = 7, rows: int = 7):
+    def __init__(self, master, gameflip_api, columns: int = 7, rows: int = 7,
+                 loader: AsyncLoader = DEFAULT_ASYNC_LOADER, price_service: typing.Optional[PriceService] = None,
+                 residency: typing.Optional[ResidencyManager] = None):
         self.gameflip_api = gameflip_api
+        self.loader = loader
+        self.price_service = price_service
+        self.residency = residency if residency is not None else ResidencyManager()
         self.columns = columns
         self.rows = rows
-        self.items = []
+        self.store = InventoryStore()
+        self.widgets: typing.Dict[ItemRecord, Item] = {}
+        self.shown = []
+        self._load_scheduled = False
         super().__init__(master, 600, 900)
+        self.scheduler = PrefetchScheduler(self, loader,
+                                           lambda item: self.get_rendered_photo(item, self.gameflip_api, self.loader),
+                                           self._on_photo_loaded, lambda: self.event_generate("<<ImagesLoaded>>"),
+                                           columns)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
         self.scrollbar.bind("<ButtonRelease-1>", lambda event: self.load_items_able_to_load())
         self.scrollbar.bind("<MouseWheel>", lambda event: self.load_items_able_to_load())
         self.scrollbar.bind("<Map>", lambda event: self.load_items_able_to_load())
         self.frame.pack()
+        self._cancel_price_refresh = None
+        if price_service is not None:
+            self._cancel_price_refresh = price_service.schedule_refresh(self, loader)
+
+    @property
+    def items(self) -> typing.List[ItemRecord]:
+        return self.store.records
+
+    def destroy(self):
+        self.scheduler.cancel()
+        if self._cancel_price_refresh is not None:
+            self._cancel_price_refresh()
+        super().destroy()
+
+    def _on_yscroll(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        if not self._load_scheduled:
+            self._load_scheduled = True
+            self.after_idle(self.load_items_able_to_load)
 
     def load_items_able_to_load(self):
-        async def get_images():
-            return await asyncio.gather(*self.get_photos(items_able_to_load))
-
-        items_able_to_load = self.get_items_able_to_load()
-        base_photos = asyncio.run(get_images())
-        items_and_base_photos = [(item, photo) for item, photo in zip(items_able_to_load, base_photos)
-                                 if photo is not None]
-        for item, image in items_and_base_photos:
-            item.update_image(image)
-        for item in items_able_to_load:
-            item.loaded_image = True
+        self._load_scheduled = False
+        first_row, last_row = self.get_visible_rows()
+        self.scheduler.update(self.shown, first_row, last_row, lambda item: not self.widgets[item].loaded_image)
+        self.protect_rows(first_row, last_row)
+        if self.price_service is not None:
+            for item in self.shown[first_row * self.columns:(last_row + 1) * self.columns]:
+                self.price_service.watch(self.widgets[item], self.loader)
+
+    def _on_photo_loaded(self, item: ItemRecord, future: concurrent.futures.Future):
+        image = future.result()
+        item.image_state = "notfound" if image is None else "normal"
+        tk_item = self.widgets[item]
+        tk_item.loaded_image = True
+        if image is None:
+            tk_item.set_state("notfound")
+        else:
+            tk_item.show_rendered_image(image)
+            self.residency.add(item, image.width * image.height * 4, self._evict_image)
+
+    def protect_rows(self, first_row: int, last_row: int):
+        """Keep the images of the visible rows, and of the prefetched rows around them, resident."""
+        margin = self.scheduler.prefetch_rows
+        self.residency.protect(self.shown[max(0, first_row - margin) * self.columns:
+                                          (last_row + 1 + margin) * self.columns])
+
+    def _evict_image(self, item: ItemRecord):
+        tk_item = self.widgets[item]
+        tk_item.clear_image()
+        tk_item.loaded_image = False
+
+    def get_visible_rows(self) -> typing.Tuple[int, int]:
+        cell_size = self.widgets[self.shown[0]].winfo_reqheight() if self.shown else 1
+        first_row = int(self.canvas.canvasy(0) // cell_size)
+        last_row = int(self.canvas.canvasy(self.canvas.winfo_height() - 1) // cell_size)
+        return first_row, last_row
 
     def get_items_able_to_load(self):
-        items_able_to_load = []
-        for item in self.items:
-            y1 = item.winfo_rooty() + item.winfo_height()
-            y2 = item.winfo_rooty()
-            canvasy1 = self.canvas.winfo_rooty()
-            canvasy2 = self.canvas.winfo_rooty() + self.canvas.winfo_height()
-            if y1 > canvasy1 and y2 < canvasy2 and not item.loaded_image:
-                items_able_to_load.append(item)
-        return items_able_to_load
+        first_row, last_row = self.get_visible_rows()
+        visible_items = self.shown[first_row * self.columns:(last_row + 1) * self.columns]
+        return [item for item in visible_items if not self.widgets[item].loaded_image]
 
     def insert_items_in_grid(self, items: typing.Iterable[Item]):
         for index, item in enumerate(items):
             column = index % self.columns
-            row = index // self.rows
+            row = index // self.columns
             item.grid(column=column, row=row)
 
-    def add_item(self, item: rl_utils.Item):
-        tk_item = Item(self, self.gameflip_api, item.name, item.slot, item.rarity, item.quantity, item.blueprint,
-                       item.serie, item.trade_lock, item.platform, item.acquired, item.favorite, item.archived,
-                       item.color, item.certified)
-        self.items.append(tk_item)
-
-    def add_items(self, items: typing.Iterable[rl_utils.Item]):
+    def add_item(self, item: rl_utils.Item) -> ItemRecord:
+        record = self.store.add(item)
+        if self.price_service is None:
+            self.widgets[record] = Item(self, self.gameflip_api, record.name, record.slot, record.rarity,
+                                        record.quantity, record.blueprint, record.serie, record.trade_lock,
+                                        record.platform, record.acquired, record.favorite, record.archived,
+                                        record.color, record.certified)
+        else:
+            self.widgets[record] = ItemWithPrice(self, self.gameflip_api, record.name, record.slot, record.rarity,
+                                                 record.quantity, record.blueprint, record.platform,
+                                                 self.price_service.get(record), 0, record.serie, record.trade_lock,
+                                                 record.acquired, record.favorite, record.archived, record.color,
+                                                 record.certified)
+        if record.image_state == "notfound":
+            self.widgets[record].loaded_image = True
+            self.widgets[record].set_state("notfound")
+        return record
+
+    def add_items(self, items: typing.Iterable[rl_utils.Item],
+                  accept: typing.Optional[typing.Callable[[ItemRecord], bool]] = None) -> typing.List[ItemRecord]:
+        """Add the items, appending to the grid the new records accepted by accept, every record by default."""
+        records = []
         for item in items:
-            self.add_item(item)
-        self.insert_items_in_grid(self.items)
+            record = self.add_item(item)
+            records.append(record)
+            if accept is None or accept(record):
+                index = len(self.shown)
+                self.widgets[record].grid(column=index % self.columns, row=index // self.columns)
+                self.shown.append(record)
+        self.load_items_able_to_load()
+        return records
+
+    def show(self, items: typing.Sequence[ItemRecord]):
+        positions = {item: index for index, item in enumerate(self.shown)}
+        for item in set(self.shown).difference(items):
+            self.widgets[item].grid_remove()
+        for index, item in enumerate(items):
+            if positions.get(item) != index:
+                self.widgets[item].grid(column=index % self.columns, row=index // self.columns)
+        self.shown = list(items)
+        self.load_items_able_to_load()
 
-    def get_photos(self, items: typing.Iterable[rl_utils.Item]):
-        for item in items:
-            yield Slots.get_photo(item, self.gameflip_api)
+    def is_photo_missing(self, item: ItemRecord) -> bool:
+        tk_item = self.widgets[item]
+        return tk_item.loaded_image and tk_item.get_state() == "notfound"
 
     @staticmethod
-    async def get_photo(item, gameflip_api):
+    async def get_photo(item, gameflip_api, downloader: IconDownloader = DEFAULT_ICON_DOWNLOADER):
         with contextlib.suppress(rl_utils.ItemNotFound):
-            return await Item.get_photo(item, gameflip_api)
+            return await Item.get_photo(item, gameflip_api, downloader=downloader)
+
+    @staticmethod
+    async def get_rendered_photo(item, gameflip_api, loader: AsyncLoader = DEFAULT_ASYNC_LOADER,
+                                 size: int = DEFAULT_ITEM_IMAGE_STYLE.size):
+        with contextlib.suppress(rl_utils.ItemNotFound):
+            return await Item.get_rendered_photo(item, gameflip_api, size, loader)
+
+
+class VirtualSlots(ScrollableFrame):
+    """Slots that keep a fixed pool of Item canvases covering the viewport and rebind them to rows on scroll.
+
+    Canvases of the items still in view keep their binding and only move, so a scroll only rebinds the rows entering
+    the viewport.
+    """
+
+    def __init__(self, master, gameflip_api, columns: int = 7, rows: int = 7,
+                 loader: AsyncLoader = DEFAULT_ASYNC_LOADER, margin: int = 1,
+                 residency: typing.Optional[ResidencyManager] = None):
+        self.gameflip_api = gameflip_api
+        self.loader = loader
+        self.residency = residency if residency is not None else ResidencyManager()
+        self.columns = columns
+        self.rows = rows
+        self.margin = margin
+        self.store = InventoryStore()
+        self.shown = []
+        self.selected = set()
+        self.pool = []
+        self._images = {}
+        self._bound = {}
+        self._start_row = None
+        self._load_scheduled = False
+        super().__init__(master, 600, 900)
+        self.scheduler = PrefetchScheduler(self, loader,
+                                           lambda item: Slots.get_rendered_photo(item, self.gameflip_api, self.loader),
+                                           self._on_photo_loaded, lambda: self.event_generate("<<ImagesLoaded>>"),
+                                           columns)
+        for _ in range(columns * (rows + 2 * margin)):
+            tk_item = Item(self, gameflip_api, "", "", "", 1, False, "", False, rl_utils.PC, datetime.datetime.now())
+            tk_item.bind("<Button-1>", lambda event, tk_item_=tk_item: self._on_click(tk_item_), add="+")
+            self.pool.append(tk_item)
+        self.cell_size = self.pool[0].winfo_reqheight()
+        self.bind("<Configure>", lambda _: self._update_scrollregion())
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.bind("<ButtonRelease-1>", lambda event: self.load_items_able_to_load())
+        self.scrollbar.bind("<MouseWheel>", lambda event: self.load_items_able_to_load())
+        self.scrollbar.bind("<Map>", lambda event: self.load_items_able_to_load())
+        self.frame.pack()
+
+    @property
+    def items(self) -> typing.List[ItemRecord]:
+        return self.store.records
+
+    def destroy(self):
+        self.scheduler.cancel()
+        super().destroy()
+
+    def _on_yscroll(self, first: str, last: str):
+        self.scrollbar.set(first, last)
+        self.refresh()
+        if not self._load_scheduled:
+            self._load_scheduled = True
+            self.after_idle(self.load_items_able_to_load)
+
+    def _on_click(self, tk_item: Item):
+        item = self._bound_item(tk_item)
+        if item is not None:
+            if tk_item.is_selected():
+                self.selected.add(item)
+            else:
+                self.selected.discard(item)
+
+    def _bound_item(self, tk_item: Item) -> typing.Optional[ItemRecord]:
+        for item, bound_tk_item in self._bound.items():
+            if bound_tk_item is tk_item:
+                return item
+        return None
+
+    def _update_scrollregion(self):
+        rows = math.ceil(len(self.shown) / self.columns)
+        self.canvas.configure(scrollregion=(0, 0, self.columns * self.cell_size, rows * self.cell_size))
+
+    def refresh(self, force: bool = False):
+        start_row = max(0, int(self.canvas.canvasy(0) // self.cell_size) - self.margin)
+        if start_row == self._start_row and not force:
+            return
+        self._start_row = start_row
+        self.canvas.coords(self.window, 0, start_row * self.cell_size)
+        bound, self._bound = ({} if force else self._bound), {}
+        start = start_row * self.columns
+        items = self.shown[start:start + len(self.pool)]
+        kept = {item: bound[item] for item in items if item in bound}
+        kept_tk_items = set(kept.values())
+        free = iter([tk_item for tk_item in self.pool if tk_item not in kept_tk_items])
+        for index, item in enumerate(items):
+            tk_item = kept.get(item)
+            if tk_item is None:
+                self._bind(next(free), item)
+                tk_item = self._bound[item]
+            else:
+                self._bound[item] = tk_item
+            tk_item.grid(column=index % self.columns, row=index // self.columns)
+        for tk_item in free:
+            tk_item.grid_remove()
+
+    def _bind(self, tk_item: Item, item: ItemRecord):
+        self._bound[item] = tk_item
+        tk_item.assign(item)
+        if item in self.selected:
+            tk_item.select()
+        else:
+            tk_item.unselect()
+        if item not in self._images:
+            tk_item.clear_image()
+        elif self._images[item] is None:
+            tk_item.set_state("notfound")
+        else:
+            tk_item.show_rendered_image(self._images[item])
+
+    def load_items_able_to_load(self):
+        self._load_scheduled = False
+        first_row, last_row = self.get_visible_rows()
+        self.scheduler.update(self.shown, first_row, last_row, lambda item: item not in self._images)
+        self.protect_rows(first_row, last_row)
+
+    def _on_photo_loaded(self, item: ItemRecord, future: concurrent.futures.Future):
+        image = self._images[item] = future.result()
+        item.image_state = "notfound" if image is None else "normal"
+        if image is not None:
+            self.residency.add(item, image.width * image.height * 4, self._evict_image)
+        tk_item = self._bound.get(item)
+        if tk_item is not None and image is None:
+            tk_item.set_state("notfound")
+        elif tk_item is not None:
+            tk_item.show_rendered_image(image)
+
+    def protect_rows(self, first_row: int, last_row: int):
+        margin = max(self.margin, self.scheduler.prefetch_rows)
+        self.residency.protect(self.shown[max(0, first_row - margin) * self.columns:
+                                          (last_row + 1 + margin) * self.columns])
+
+    def _evict_image(self, item: ItemRecord):
+        self._images.pop(item, None)
+
+    def get_visible_rows(self) -> typing.Tuple[int, int]:
+        first_row = int(self.canvas.canvasy(0) // self.cell_size)
+        last_row = int(self.canvas.canvasy(self.canvas.winfo_height() - 1) // self.cell_size)
+        return first_row, last_row
+
+    def get_items_able_to_load(self):
+        first_row, last_row = self.get_visible_rows()
+        visible_items = self.shown[first_row * self.columns:(last_row + 1) * self.columns]
+        return [item for item in visible_items if item not in self._images]
+
+    def add_item(self, item: rl_utils.Item) -> ItemRecord:
+        record = self.store.add(item)
+        if record.image_state == "notfound":
+            self._images[record] = None
+        return record
+
+    def add_items(self, items: typing.Iterable[rl_utils.Item],
+                  accept: typing.Optional[typing.Callable[[ItemRecord], bool]] = None) -> typing.List[ItemRecord]:
+        records = [self.add_item(item) for item in items]
+        self.shown.extend(record for record in records if accept is None or accept(record))
+        self._update_scrollregion()
+        self.refresh(force=True)
+        self.load_items_able_to_load()
+        return records
+
+    def show(self, items: typing.Sequence[ItemRecord]):
+        self.shown = list(items)
+        self._update_scrollregion()
+        self.refresh(force=True)
+        self.load_items_able_to_load()
+
+    def is_photo_missing(self, item: ItemRecord) -> bool:
+        return item in self._images and self._images[item] is None
 
 
 class Inventory(tk.Frame):
     sort_options = {"Alphabetical": lambda tk_item: tk_item.name,
                     "Most Recent": lambda tk_item: tk_item.acquired,
-                    "Quality": lambda tk_item: tk_item.rarity,
+                    "Quality": lambda tk_item: get_rarity_rank(tk_item.rarity),
                     "Quantity": lambda tk_item: tk_item.quantity,
                     "Series": lambda tk_item: tk_item.serie}
 
-    def __init__(self, master: typing.Union[tk.Widget, tk.Tk], gameflip_api):
+    def __init__(self, master: typing.Union[tk.Widget, tk.Tk], gameflip_api,
+                 loader: AsyncLoader = DEFAULT_ASYNC_LOADER, virtual: bool = False,
+                 residency: typing.Optional[ResidencyManager] = None):
         self.filter_results = {}
+        self.filter_conditions: typing.Dict[str, typing.Tuple[str, typing.Callable[[str, str], bool]]] = {}
+        self.filter_index = FilterIndex()
+        self.sort_indexes = {sort: SortIndex(key) for sort, key in self.sort_options.items()}
         super().__init__(master)
         filters_frame = tk.Frame(self)
         filters_frame.pack(padx=25, pady=25)
@@ -472,7 +984,7 @@ class Inventory(tk.Frame):
         filters_frame.grid_columnconfigure(tk.ALL, pad=5.0)
         self.name_filter.bind("<KeyRelease>", lambda _: self.on_filter_or_sort())
         self.show_no_photo_items_var.trace_add("write", lambda var, index, mode: self.on_filter_or_sort())
-        self.slots = Slots(self, gameflip_api)
+        self.slots = (VirtualSlots if virtual else Slots)(self, gameflip_api, loader=loader, residency=residency)
         self.current_filter = self.slots.items
         for filter_ in (self.slot_filter, self.color_filter, self.certified_filter, self.rarity_filter,
                         self.sort_by):
@@ -480,16 +992,50 @@ class Inventory(tk.Frame):
         self.slots.scrollbar.bind("<ButtonRelease-1>", lambda event: self.on_scroll())
         self.slots.scrollbar.bind("<MouseWheel>", lambda event: self.on_scroll())
         self.slots.scrollbar.bind("<Map>", lambda event: self.on_scroll())
+        self.slots.bind("<<ImagesLoaded>>", lambda event: self.on_images_loaded())
+
+    def add_items(self, items: typing.Iterable[rl_utils.Item]):
+        """Add the items, the new records passing the active filters are appended to the grid.
+
+        With a sort selected the new records have to be placed among the shown ones, so the grid is updated instead.
+        """
+        sort = self.sort_by.get()
+        records = self.slots.add_items(items, (lambda record: False) if sort else self.matches_filters)
+        self.filter_index.update(self.slots.items)
+        for attribute_name, (attribute, condition) in self.filter_conditions.items():
+            self.filter_results[attribute_name].update(
+                record for record in records if condition(attribute, getattr(record, attribute_name)))
+        if "no_photo_items" in self.filter_results:
+            self.filter_results["no_photo_items"].update(filter(self.filter_no_photo_items, records))
+        if sort:
+            self.apply_filter()
+        else:
+            self.current_filter = list(self.slots.shown)
+
+    def matches_filters(self, item: ItemRecord) -> bool:
+        if "no_photo_items" in self.filter_results and not self.filter_no_photo_items(item):
+            return False
+        return all(condition(attribute, getattr(item, attribute_name))
+                   for attribute_name, (attribute, condition) in self.filter_conditions.items())
+
+    def ingest(self, items: typing.Iterable[rl_utils.Item], time_slice: float = 0.01) -> ChunkedIngestion:
+        """Add the items progressively, in chunks that keep each pass of the event loop within time_slice."""
+        return ChunkedIngestion(self, items, self.add_items, time_slice).start()
 
     def on_scroll(self):
         self.slots.load_items_able_to_load()
         self.on_scroll_filter()
         self.apply_filter()
 
+    def on_images_loaded(self):
+        self.on_scroll_filter()
+        self.apply_filter()
+
     def on_scroll_filter(self):
         self.filter_results["no_photo_items"] = set(filter(self.filter_no_photo_items, self.slots.items))
 
     def on_filter_or_sort(self):
+        self.filter_index.update(self.slots.items)
         self.add_attribute_filter(self.name_filter, rl_utils.contains_name)
         self.add_attribute_filter(self.slot_filter, slot_utils.is_exactly)
         self.add_attribute_filter(self.color_filter, color_utils.is_exactly)
@@ -499,45 +1045,46 @@ class Inventory(tk.Frame):
         self.slots.scrollbar.set(0, 0)
 
     def update_grid(self):
-        for index, item in enumerate(self.current_filter):
-            column = index % self.slots.columns
-            row = index // self.slots.rows
-            item.grid_configure(column=column, row=row)
+        with DEFAULT_METRICS.timer("grid_update"):
+            self.slots.show(self.current_filter)
 
     def apply_filter(self):
-        new_filter = set(self.slots.items)
-        for filter_result in self.filter_results.values():
-            new_filter.intersection_update(filter_result)
-        current_filter_set = set(self.current_filter)
-        items_to_remove = current_filter_set.difference(new_filter)
-        items_to_add = new_filter.difference(current_filter_set)
-        self.current_filter = list(new_filter)
+        with DEFAULT_METRICS.timer("filter"):
+            self._apply_filter()
+
+    def _apply_filter(self):
+        filter_results = sorted(self.filter_results.values(), key=len)
+        if filter_results:
+            new_filter = filter_results[0].intersection(*filter_results[1:])
+        else:
+            new_filter = set(self.slots.items)
         if sort := self.sort_by.get():
-            self.current_filter.sort(key=self.sort_options[sort])
-        for item in items_to_remove:
-            item.grid_remove()
-        self.slots.insert_items_in_grid(items_to_add)
-        if len(items_to_remove) > 0:
+            self.sort_indexes[sort].update(self.slots.items)
+            self.current_filter = self.sort_indexes[sort].ordered(new_filter)
+        else:
+            self.current_filter = [item for item in self.slots.items if item in new_filter]
+        if self.current_filter != self.slots.shown:
             self.update_grid()
 
     def add_attribute_filter(self, filter_widget, condition):
         attribute_name = filter_widget.winfo_name()
         if attribute := filter_widget.get():
-            self.filter_results[attribute_name] = set(filter(
-                lambda tk_item: condition(attribute, getattr(tk_item, attribute_name)),
-                self.slots.items))
+            self.filter_results[attribute_name] = set(self.filter_index.filter(attribute_name, attribute, condition))
+            self.filter_conditions[attribute_name] = (attribute, condition)
         elif attribute_name in self.filter_results:
             self.filter_results.pop(attribute_name)
+            self.filter_conditions.pop(attribute_name)
 
-    def filter_no_photo_items(self, tk_item: Item):
+    def filter_no_photo_items(self, item: ItemRecord):
         if self.show_no_photo_items_var.get():
             return True
         else:
-            return (tk_item.get_state() == "normal" and tk_item.loaded_image) or not tk_item.loaded_image
+            return not self.slots.is_photo_missing(item)
 
 
 class Trade(tk.Frame):
-    def __init__(self, items: typing.Iterable[rl_utils.Item], gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI):
+    def __init__(self, items: typing.Iterable[rl_utils.Item], gameflip_api: rl_gameflip_api.RocketLeagueGameflipAPI,
+                 price_service: typing.Optional[PriceService] = None):
         super().__init__()
-        self.slots = Slots(self, gameflip_api)
+        self.slots = Slots(self, gameflip_api, price_service=price_service)
         self.slots.add_items(items)
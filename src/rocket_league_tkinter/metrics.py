@@ -0,0 +1,183 @@
+import atexit
+import collections
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+import typing
+
+METRICS_ENVIRONMENT_VARIABLE = "ROCKET_LEAGUE_TKINTER_METRICS"
+TRACE_ENVIRONMENT_VARIABLE = "ROCKET_LEAGUE_TKINTER_TRACE"
+DEFAULT_MAX_TRACE_EVENTS = 1_000_000
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class LatencyHistogram:
+    """Latencies bucketed by powers of two of microseconds."""
+
+    def __init__(self):
+        self.buckets: typing.Counter[int] = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.buckets[max(0, math.ceil(math.log2(max(seconds * 1e6, 1))))] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "LatencyHistogram"):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Return the upper bound of the bucket holding the percentile, in seconds."""
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket / 1e6, self.max)
+        return self.max
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.record(self.name, time.perf_counter() - self.start, self.start)
+
+
+class Metrics:
+    """Counters, cache hit ratios and latency histograms of the hot paths, optionally traced to a file.
+
+    Every method returns right away while disabled, timer() then hands back a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False, trace: bool = False, max_trace_events: int = DEFAULT_MAX_TRACE_EVENTS):
+        self.enabled = enabled
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+        self.counters: typing.Counter[str] = collections.Counter()
+        self.histograms: typing.Dict[str, LatencyHistogram] = collections.defaultdict(LatencyHistogram)
+        self.events: typing.List[dict] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> "Metrics":
+        """Enable the metrics if the environment asks for them, dumping the summary and trace at exit."""
+        trace_path = os.environ.get(TRACE_ENVIRONMENT_VARIABLE)
+        metrics = cls(bool(os.environ.get(METRICS_ENVIRONMENT_VARIABLE) or trace_path), bool(trace_path))
+        if metrics.enabled:
+            atexit.register(lambda: sys.stderr.write(metrics.summary() + "\n"))
+        if trace_path:
+            atexit.register(metrics.write_trace, trace_path)
+        return metrics
+
+    def count(self, name: str, value: int = 1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += value
+
+    def hit(self, name: str, hit: bool):
+        if self.enabled:
+            with self._lock:
+                self.counters[f"{name}.{'hit' if hit else 'miss'}"] += 1
+
+    def hit_ratio(self, name: str) -> typing.Optional[float]:
+        hits, misses = self.counters[f"{name}.hit"], self.counters[f"{name}.miss"]
+        return hits / (hits + misses) if hits + misses else None
+
+    def timer(self, name: str) -> typing.ContextManager:
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name: str, seconds: float, start: typing.Optional[float] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.histograms[name].add(seconds)
+            if self.trace and len(self.events) < self.max_trace_events:
+                start = start if start is not None else time.perf_counter() - seconds
+                self.events.append({"name": name, "ph": "X", "ts": (start - self._origin) * 1e6,
+                                    "dur": seconds * 1e6, "pid": os.getpid(), "tid": threading.get_ident()})
+
+    def drain(self) -> typing.Tuple[typing.Dict[str, int], typing.Dict[str, LatencyHistogram], typing.List[dict]]:
+        """Return everything recorded since the last drain and reset, for merge() in another process."""
+        with self._lock:
+            events = [dict(event, ts=event["ts"] + self._origin * 1e6) for event in self.events]
+            snapshot = dict(self.counters), dict(self.histograms), events
+            self.counters.clear()
+            self.histograms.clear()
+            self.events.clear()
+        return snapshot
+
+    def merge(self, snapshot: typing.Tuple[typing.Dict[str, int], typing.Dict[str, LatencyHistogram],
+                                           typing.List[dict]]):
+        """Add a snapshot returned by drain(), event times are perf_counter based and shared between processes."""
+        if not self.enabled:
+            return
+        counters, histograms, events = snapshot
+        with self._lock:
+            self.counters.update(counters)
+            for name, histogram in histograms.items():
+                self.histograms[name].merge(histogram)
+            room = max(0, self.max_trace_events - len(self.events))
+            self.events.extend(dict(event, ts=event["ts"] - self._origin * 1e6) for event in events[:room])
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.events.clear()
+            self._origin = time.perf_counter()
+
+    def summary(self) -> str:
+        lines = [f"{'operation':<16}{'count':>9}" + "".join(f"{column:>10}" for column in
+                                                        ("mean ms", "p50 ms", "p95 ms", "p99 ms", "max ms"))]
+        for name, histogram in sorted(self.histograms.items()):
+            lines.append(f"{name:<16}{histogram.count:>9}{histogram.mean * 1e3:>10.2f}"
+                         f"{histogram.percentile(50) * 1e3:>10.2f}{histogram.percentile(95) * 1e3:>10.2f}"
+                         f"{histogram.percentile(99) * 1e3:>10.2f}{histogram.max * 1e3:>10.2f}")
+        caches = sorted({name.rsplit(".", 1)[0] for name in self.counters if name.endswith((".hit", ".miss"))})
+        for name in caches:
+            lines.append(f"{name} hit ratio: {self.hit_ratio(name):.1%}")
+        for name, value in sorted(self.counters.items()):
+            if not name.endswith((".hit", ".miss")):
+                lines.append(f"{name}: {value}")
+        return "\n".join(lines)
+
+    def write_trace(self, path: typing.Union[str, os.PathLike]):
+        """Write the recorded spans in the Chrome trace event format, readable by chrome://tracing and Perfetto."""
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+DEFAULT_METRICS = Metrics.from_environment()
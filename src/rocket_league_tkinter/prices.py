@@ -0,0 +1,152 @@
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import functools
+import itertools
+import tkinter as tk
+import typing
+import weakref
+import rocket_league_utils as rl_utils
+from rocket_league_tkinter.loader import AsyncLoader
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+from rocket_league_tkinter.store import ItemRecord
+
+DEFAULT_PRICE_TTL = datetime.timedelta(minutes=30)
+
+Price = typing.Tuple[int, int]
+PriceKey = typing.Tuple[str, str, str]
+PriceFetcher = typing.Callable[[typing.Sequence[ItemRecord]], typing.Sequence[typing.Optional[Price]]]
+
+
+class PriceEntry:
+    def __init__(self, price: typing.Optional[Price], stored_at: float):
+        self.price = price
+        self.stored_at = stored_at
+
+
+class PriceService:
+    """Prices shared by every ItemWithPrice, looked up in batches, cached with a ttl and refreshed when stale.
+
+    fetch receives a batch of item records and returns one (min, max) price, or None if unknown, per item. It runs
+    in a worker thread of the loader event loop.
+    """
+
+    def __init__(self, fetch: PriceFetcher, ttl: datetime.timedelta = DEFAULT_PRICE_TTL, max_batch_size: int = 50,
+                 batch_delay: float = 0.05):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_batch_size = max_batch_size
+        self.batch_delay = batch_delay
+        self._entries: typing.Dict[PriceKey, PriceEntry] = {}
+        self._watchers: typing.Dict[PriceKey, weakref.WeakSet] = collections.defaultdict(weakref.WeakSet)
+        self._requested: typing.Set[PriceKey] = set()
+        self._batch: typing.Dict[PriceKey, typing.Tuple[ItemRecord, asyncio.Future]] = {}
+        self._futures: typing.Dict[PriceKey, asyncio.Future] = {}
+
+    @staticmethod
+    def get_key(item: rl_utils.ReprItem) -> PriceKey:
+        return tuple(" ".join(str(value).casefold().split()) for value in (item.name, item.color, item.certified))
+
+    def is_fresh(self, entry: PriceEntry) -> bool:
+        return datetime.datetime.now().timestamp() - entry.stored_at < self.ttl.total_seconds()
+
+    def get(self, item: rl_utils.ReprItem) -> typing.Optional[Price]:
+        """Return the cached price of the item, fresh or not."""
+        entry = self._entries.get(self.get_key(item))
+        return entry.price if entry is not None else None
+
+    def watch(self, widget, loader: AsyncLoader):
+        """Show the price on an ItemWithPrice, now if it is cached and again whenever it is looked up."""
+        key = self.get_key(widget)
+        self._watchers[key].add(widget)
+        entry = self._entries.get(key)
+        DEFAULT_METRICS.hit("prices", entry is not None and self.is_fresh(entry))
+        if entry is not None:
+            self._apply(key, entry.price)
+        if entry is None or not self.is_fresh(entry):
+            self._request(key, widget, loader)
+
+    def _request(self, key: PriceKey, item: rl_utils.ReprItem, loader: AsyncLoader):
+        if key not in self._requested:
+            self._requested.add(key)
+            loader.submit(item, self._lookup(key, ItemRecord.from_item(item)),
+                          functools.partial(self._on_looked_up, key))
+
+    def refresh(self, loader: AsyncLoader):
+        """Look up again the stale prices of the watched items."""
+        for key, watchers in tuple(self._watchers.items()):
+            entry = self._entries.get(key)
+            item = next(iter(watchers), None)
+            if item is None:
+                del self._watchers[key]
+            elif entry is not None and not self.is_fresh(entry):
+                self._request(key, item, loader)
+
+    def schedule_refresh(self, widget: tk.Misc, loader: AsyncLoader,
+                         interval: typing.Optional[int] = None) -> typing.Callable[[], None]:
+        """Refresh the stale prices every interval milliseconds, a tenth of the ttl by default, while widget lives.
+
+        Return a function cancelling the refresh.
+        """
+        interval = interval if interval is not None else max(1000, int(self.ttl.total_seconds() * 100))
+        after_id = None
+
+        def tick():
+            nonlocal after_id
+            after_id = None
+            if widget.winfo_exists():
+                self.refresh(loader)
+                after_id = widget.after(interval, tick)
+
+        def cancel():
+            nonlocal after_id
+            if after_id is not None:
+                widget.after_cancel(after_id)
+                after_id = None
+
+        after_id = widget.after(interval, tick)
+        return cancel
+
+    def _on_looked_up(self, key: PriceKey, future: concurrent.futures.Future):
+        self._requested.discard(key)
+        if not future.cancelled() and future.exception() is None:
+            self._apply(key, future.result())
+
+    def _apply(self, key: PriceKey, price: typing.Optional[Price]):
+        if price is None:
+            return
+        for widget in tuple(self._watchers.get(key, ())):
+            if widget.price != price:
+                widget.price = price
+
+    async def _lookup(self, key: PriceKey, item: ItemRecord) -> typing.Optional[Price]:
+        loop = asyncio.get_running_loop()
+        future = self._futures.get(key)
+        if future is None:
+            future = self._futures[key] = loop.create_future()
+            future.add_done_callback(lambda _: self._futures.pop(key, None))
+            if not self._batch:
+                loop.call_later(self.batch_delay, self._flush)
+            self._batch[key] = (item, future)
+            if len(self._batch) >= self.max_batch_size:
+                self._flush()
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        batch, self._batch = self._batch, {}
+        if batch:
+            asyncio.ensure_future(self._fetch_batch(batch))
+
+    async def _fetch_batch(self, batch: typing.Dict[PriceKey, typing.Tuple[ItemRecord, asyncio.Future]]):
+        try:
+            with DEFAULT_METRICS.timer("price_lookup"):
+                prices = await asyncio.to_thread(self.fetch, [item for item, _ in batch.values()])
+        except Exception as error:
+            for _, future in batch.values():
+                future.set_exception(error)
+            return
+        stored_at = datetime.datetime.now().timestamp()
+        for (key, (_, future)), price in zip(batch.items(), itertools.chain(prices, itertools.repeat(None))):
+            self._entries[key] = PriceEntry(price, stored_at)
+            future.set_result(price)
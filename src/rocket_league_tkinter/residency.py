@@ -0,0 +1,66 @@
+import collections
+import typing
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+
+DEFAULT_RESIDENCY_BUDGET = 64 * 1024 * 1024
+
+
+class ResidencyManager:
+    """Memory held by the loaded tile images, the least recently shown are evicted once it exceeds budget bytes.
+
+    Protected tiles, the ones in and around the viewport, are never evicted. An evicted tile is loaded again when it
+    scrolls back in, from the tile atlas or the icon cache.
+    """
+
+    def __init__(self, budget: int = DEFAULT_RESIDENCY_BUDGET):
+        self.budget = budget
+        self.size = 0
+        self._entries: collections.OrderedDict[typing.Hashable, typing.Tuple[int, typing.Callable]] = \
+            collections.OrderedDict()
+        self._protected: typing.Set[typing.Hashable] = set()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: typing.Hashable) -> bool:
+        return key in self._entries
+
+    def add(self, key: typing.Hashable, size: int, evict: typing.Callable[[typing.Hashable], typing.Any]):
+        """Track an image of size bytes, evict(key) is called to release it."""
+        self.discard(key)
+        self._entries[key] = (size, evict)
+        self.size += size
+        self._evict()
+
+    def discard(self, key: typing.Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[0]
+
+    def protect(self, keys: typing.Iterable[typing.Hashable]):
+        """Protect only these keys from eviction, and mark them as the most recently shown."""
+        keys = list(keys)
+        self._protected = set(keys)
+        for key in keys:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        self._evict()
+
+    def clear(self):
+        self._entries.clear()
+        self._protected.clear()
+        self.size = 0
+
+    def _evict(self):
+        size, victims = self.size, []
+        for key, (entry_size, _) in self._entries.items():
+            if size <= self.budget:
+                break
+            if key not in self._protected:
+                victims.append(key)
+                size -= entry_size
+        for key in victims:
+            entry_size, evict = self._entries.pop(key)
+            self.size -= entry_size
+            DEFAULT_METRICS.count("tile_evictions")
+            evict(key)
@@ -0,0 +1,144 @@
+import collections
+import datetime
+import mmap
+import os
+import pathlib
+import struct
+import typing
+import rocket_league_utils as rl_utils
+from rocket_league_tkinter.cache import DEFAULT_CACHE_ROOT
+from rocket_league_tkinter.store import ItemRecord
+
+DEFAULT_SNAPSHOT_PATH = DEFAULT_CACHE_ROOT / "inventory.snapshot"
+DEFAULT_NOT_FOUND_MAX_AGE = datetime.timedelta(days=1)
+
+_MAGIC = b"RLTS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHdII")
+_STRING_LENGTH = struct.Struct("<I")
+_RECORD = struct.Struct("<7IiBdIB")
+_NO_STRING = 0xFFFFFFFF
+_STATES = (None, "normal", "notfound")
+_FLAGS = ("blueprint", "trade_lock", "favorite", "archived")
+
+
+class SnapshotDiff:
+    def __init__(self):
+        self.added: typing.List[ItemRecord] = []
+        self.removed: typing.List[ItemRecord] = []
+        self.changed: typing.List[ItemRecord] = []
+        self.unchanged: typing.List[ItemRecord] = []
+
+    def __repr__(self) -> str:
+        return (f"{self.__class__.__name__}(added={len(self.added)}, removed={len(self.removed)}, "
+                f"changed={len(self.changed)}, unchanged={len(self.unchanged)})")
+
+
+class InventorySnapshot:
+    """Binary snapshot of the last inventory, with the icon url and image state resolved for every record."""
+
+    def __init__(self, records: typing.Iterable[ItemRecord] = (), created_at: float = 0.0):
+        self.records = list(records)
+        self.created_at = created_at
+
+    @staticmethod
+    def get_key(item: rl_utils.Item) -> tuple:
+        return item.name, item.slot, item.color, item.certified, item.platform, item.blueprint
+
+    @staticmethod
+    def get_values(item: rl_utils.Item) -> tuple:
+        return item.rarity, item.serie, item.quantity, item.trade_lock, item.favorite, item.archived
+
+    @classmethod
+    def load(cls, path: typing.Union[str, os.PathLike] = DEFAULT_SNAPSHOT_PATH) -> "InventorySnapshot":
+        """Read the snapshot through a memory map, returning an empty snapshot if it is missing or invalid."""
+        try:
+            with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return cls._parse(buffer)
+        except (OSError, ValueError, struct.error, UnicodeDecodeError):
+            return cls()
+
+    @classmethod
+    def _parse(cls, buffer: mmap.mmap) -> "InventorySnapshot":
+        magic, version, created_at, string_count, record_count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("Unsupported inventory snapshot.")
+        offset = _HEADER.size
+        strings = []
+        for _ in range(string_count):
+            length, = _STRING_LENGTH.unpack_from(buffer, offset)
+            offset += _STRING_LENGTH.size
+            strings.append(buffer[offset:offset + length].decode("utf-8"))
+            offset += length
+        records = []
+        for _ in range(record_count):
+            (name, slot, rarity, serie, platform, color, certified, quantity, flags, acquired, icon_url,
+             image_state) = _RECORD.unpack_from(buffer, offset)
+            offset += _RECORD.size
+            name, slot, rarity, serie, platform, color, certified, icon_url = (
+                None if index == _NO_STRING else strings[index]
+                for index in (name, slot, rarity, serie, platform, color, certified, icon_url))
+            blueprint, trade_lock, favorite, archived = (bool(flags & (1 << bit)) for bit in range(len(_FLAGS)))
+            records.append(ItemRecord(name, slot, rarity, quantity, blueprint, serie, trade_lock, platform,
+                                      datetime.datetime.fromtimestamp(acquired), favorite, archived, color,
+                                      certified, icon_url, _STATES[image_state]))
+        return cls(records, created_at)
+
+    @staticmethod
+    def save(records: typing.Iterable[ItemRecord], path: typing.Union[str, os.PathLike] = DEFAULT_SNAPSHOT_PATH):
+        string_indexes: typing.Dict[str, int] = {}
+
+        def get_string_index(string: typing.Optional[str]) -> int:
+            if string is None:
+                return _NO_STRING
+            return string_indexes.setdefault(string, len(string_indexes))
+
+        packed_records = []
+        for record in records:
+            flags = sum(1 << bit for bit, flag in enumerate(_FLAGS) if getattr(record, flag))
+            packed_records.append(_RECORD.pack(
+                get_string_index(record.name), get_string_index(record.slot), get_string_index(record.rarity),
+                get_string_index(record.serie), get_string_index(record.platform), get_string_index(record.color),
+                get_string_index(record.certified), record.quantity, flags, record.acquired.timestamp(),
+                get_string_index(record.icon_url), _STATES.index(record.image_state)))
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = path.with_suffix(".tmp")
+        with open(temporary_path, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, _VERSION, datetime.datetime.now().timestamp(), len(string_indexes),
+                                    len(packed_records)))
+            for string in string_indexes:
+                encoded = string.encode("utf-8")
+                file.write(_STRING_LENGTH.pack(len(encoded)))
+                file.write(encoded)
+            file.writelines(packed_records)
+        os.replace(temporary_path, path)
+
+    def merge(self, items: typing.Iterable[rl_utils.Item], diff: typing.Optional[SnapshotDiff] = None,
+              not_found_max_age: datetime.timedelta = DEFAULT_NOT_FOUND_MAX_AGE) -> typing.Iterator[ItemRecord]:
+        """Yield a record for each item, reusing the snapshot record and its resolved state when nothing changed."""
+        diff = diff if diff is not None else SnapshotDiff()
+        keep_not_found = datetime.datetime.now().timestamp() - self.created_at < not_found_max_age.total_seconds()
+        previous_records = collections.defaultdict(collections.deque)
+        for record in self.records:
+            previous_records[self.get_key(record)].append(record)
+        for item in items:
+            key = self.get_key(item)
+            previous = previous_records[key].popleft() if previous_records.get(key) else None
+            if previous is None:
+                record = ItemRecord.from_item(item)
+                diff.added.append(record)
+            elif self.get_values(previous) == self.get_values(item):
+                record = previous
+                if record.image_state == "notfound" and not keep_not_found:
+                    record.image_state = None
+                diff.unchanged.append(record)
+            else:
+                record = ItemRecord.from_item(item)
+                record.acquired = previous.acquired
+                record.icon_url = previous.icon_url
+                record.image_state = None
+                diff.changed.append(record)
+            yield record
+        for records in previous_records.values():
+            diff.removed.extend(records)
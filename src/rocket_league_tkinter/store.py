@@ -0,0 +1,76 @@
+import collections
+import datetime
+import sys
+import typing
+import rocket_league_utils as rl_utils
+from rocket_league_utils import constants
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class ItemRecord:
+    """Plain inventory row, with the repeated attribute strings interned."""
+
+    __slots__ = ("name", "slot", "rarity", "quantity", "blueprint", "serie", "trade_lock", "platform", "acquired",
+                 "favorite", "archived", "color", "certified", "icon_url", "image_state")
+
+    def __init__(self, name: str, slot: str, rarity: str, quantity: int, blueprint: bool, serie: str,
+                 trade_lock: bool, platform: str, acquired: datetime.datetime, favorite: bool = False,
+                 archived: bool = False, color: str = constants.DEFAULT, certified: str = constants.NONE,
+                 icon_url: typing.Optional[str] = None,
+                 image_state: typing.Optional[typing.Literal["normal", "notfound"]] = None):
+        self.name = _intern(name)
+        self.slot = _intern(slot)
+        self.rarity = _intern(rarity)
+        self.quantity = quantity
+        self.blueprint = blueprint
+        self.serie = _intern(serie)
+        self.trade_lock = trade_lock
+        self.platform = _intern(platform)
+        self.acquired = acquired
+        self.favorite = favorite
+        self.archived = archived
+        self.color = _intern(color)
+        self.certified = _intern(certified)
+        self.icon_url = icon_url
+        self.image_state = image_state
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name!r}, {self.slot!r}, {self.rarity!r}, color={self.color!r})"
+
+    @classmethod
+    def from_item(cls, item: rl_utils.Item) -> "ItemRecord":
+        if isinstance(item, cls):
+            return item
+        return cls(item.name, item.slot, item.rarity, item.quantity, item.blueprint, item.serie, item.trade_lock,
+                   item.platform, item.acquired, item.favorite, item.archived, item.color, item.certified)
+
+
+class InventoryStore:
+    """Records of an inventory, kept apart from the widgets that display them."""
+
+    def __init__(self, items: typing.Iterable[rl_utils.Item] = ()):
+        self.records: typing.List[ItemRecord] = []
+        self.add_items(items)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> typing.Iterator[ItemRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, index: int) -> ItemRecord:
+        return self.records[index]
+
+    def add(self, item: rl_utils.Item) -> ItemRecord:
+        record = ItemRecord.from_item(item)
+        self.records.append(record)
+        return record
+
+    def add_items(self, items: typing.Iterable[rl_utils.Item]) -> typing.List[ItemRecord]:
+        return [self.add(item) for item in items]
+
+    def count_by(self, attribute: str) -> typing.Counter:
+        return collections.Counter(getattr(record, attribute) for record in self.records)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import atexit
+import collections
+import contextlib
+import json
+import mmap
+import os
+import pathlib
+import threading
+import typing
+import weakref
+from rocket_league_tkinter.cache import DEFAULT_CACHE_ROOT
+from rocket_league_tkinter.lazy import lazy_import
+from rocket_league_tkinter.metrics import DEFAULT_METRICS
+
+Image = lazy_import("PIL.Image")
+
+DEFAULT_TILE_ATLAS_DIRECTORY = DEFAULT_CACHE_ROOT / "tiles"
+DEFAULT_TILE_ATLAS_MAX_SIZE = 256 * 1024 * 1024
+
+
+class TileAtlas:
+    """Rendered tiles packed in fixed-size RGBA slots, one sprite file per tile size, read through a memory map.
+
+    Tiles are keyed by the content key of their icon and their rarity, slots are reused in LRU order but never
+    while an image served from them is still alive. The index is saved before a slot is reused, so it never maps a
+    key to the tile that replaced it.
+    """
+
+    def __init__(self, directory: typing.Union[str, os.PathLike] = DEFAULT_TILE_ATLAS_DIRECTORY,
+                 max_size: int = DEFAULT_TILE_ATLAS_MAX_SIZE, flush_interval: int = 32):
+        self.directory = pathlib.Path(directory)
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._slots: typing.Optional[typing.Dict[int, collections.OrderedDict[str, int]]] = None
+        self._maps: typing.Dict[int, mmap.mmap] = {}
+        self._pinned: typing.Dict[int, typing.Counter[int]] = collections.defaultdict(collections.Counter)
+        self._lock = threading.RLock()
+        self._pending_changes = 0
+        atexit.register(self.flush)
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        return self.directory / "index.json"
+
+    @property
+    def slots(self) -> typing.Dict[int, collections.OrderedDict[str, int]]:
+        if self._slots is None:
+            self._slots = self._load_index()
+        return self._slots
+
+    @staticmethod
+    def get_key(icon_key: str, rarity: str) -> str:
+        return f"{icon_key}:{' '.join(rarity.casefold().split())}"
+
+    @staticmethod
+    def get_tile_size(size: int) -> int:
+        return size * size * 4
+
+    def get_capacity(self, size: int) -> int:
+        return self.max_size // self.get_tile_size(size)
+
+    def _sprite_path(self, size: int) -> pathlib.Path:
+        return self.directory / f"{size}.rgba"
+
+    def _load_index(self) -> typing.Dict[int, collections.OrderedDict[str, int]]:
+        slots = {}
+        try:
+            with open(self.index_path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return slots
+        for size, entries in data.items():
+            size = int(size)
+            with contextlib.suppress(OSError):
+                count = self._sprite_path(size).stat().st_size // self.get_tile_size(size)
+                slots[size] = collections.OrderedDict((key, slot) for key, slot in entries if slot < count)
+        return slots
+
+    def _save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.index_path.with_suffix(".tmp")
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump({size: list(entries.items()) for size, entries in self.slots.items()}, file)
+        os.replace(temporary_path, self.index_path)
+        self._pending_changes = 0
+
+    def _mark_changed(self):
+        self._pending_changes += 1
+        if self._pending_changes >= self.flush_interval:
+            self._save_index()
+
+    def flush(self):
+        with self._lock:
+            if self._pending_changes:
+                self._save_index()
+
+    def _get_map(self, size: int, end: int) -> typing.Optional[mmap.mmap]:
+        mapping = self._maps.get(size)
+        if mapping is None or len(mapping) < end:
+            with open(self._sprite_path(size), "rb") as file:
+                if os.fstat(file.fileno()).st_size < end:
+                    return None
+                mapping = self._maps[size] = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapping
+
+    def get(self, icon_key: str, rarity: str, size: int = 125) -> typing.Optional[Image.Image]:
+        """Return the tile as an image sharing the memory of the sprite file, or None if it is not packed yet."""
+        key = self.get_key(icon_key, rarity)
+        tile_size = self.get_tile_size(size)
+        with self._lock:
+            entries = self.slots.get(size)
+            slot = entries.get(key) if entries is not None else None
+            if slot is None:
+                DEFAULT_METRICS.hit("tile_atlas", False)
+                return None
+            try:
+                mapping = self._get_map(size, (slot + 1) * tile_size)
+            except (OSError, ValueError):
+                mapping = None
+            if mapping is None:
+                del entries[key]
+                self._mark_changed()
+                DEFAULT_METRICS.hit("tile_atlas", False)
+                return None
+            entries.move_to_end(key)
+            self._pinned[size][slot] += 1
+        DEFAULT_METRICS.hit("tile_atlas", True)
+        buffer = memoryview(mapping)[slot * tile_size:(slot + 1) * tile_size]
+        image = Image.frombuffer("RGBA", (size, size), buffer, "raw", "RGBA", 0, 1)
+        weakref.finalize(image, self._unpin, size, slot)
+        return image
+
+    def _unpin(self, size: int, slot: int):
+        with self._lock:
+            pins = self._pinned[size]
+            pins[slot] -= 1
+            if pins[slot] <= 0:
+                del pins[slot]
+
+    def put(self, icon_key: str, rarity: str, size: int, data: bytes) -> bool:
+        """Pack the RGBA data of a rendered tile, returning False if every slot is in use."""
+        key = self.get_key(icon_key, rarity)
+        tile_size = self.get_tile_size(size)
+        if len(data) != tile_size:
+            raise ValueError(f"Expected {tile_size} bytes for a {size}px tile, got {len(data)}.")
+        with self._lock:
+            entries = self.slots.setdefault(size, collections.OrderedDict())
+            slot = self._allocate(size, entries, key)
+            if slot is None:
+                return False
+            path = self._sprite_path(size)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "r+b" if path.is_file() else "wb") as file:
+                    file.seek(slot * tile_size)
+                    file.write(data)
+            except OSError:
+                return False
+            entries[key] = slot
+            self._mark_changed()
+            return True
+
+    def _allocate(self, size: int, entries: collections.OrderedDict[str, int], key: str) -> typing.Optional[int]:
+        if key in entries:
+            slot = entries[key]
+            return None if slot in self._pinned[size] else entries.pop(key)
+        used = set(self._pinned[size]).union(entries.values())
+        slot = next(slot for slot in range(len(used) + 1) if slot not in used)
+        if slot < self.get_capacity(size):
+            return slot
+        for old_key, slot in entries.items():
+            if slot not in self._pinned[size]:
+                del entries[old_key]
+                self._save_index()
+                return slot
+        return None
+
+    def clear(self):
+        with self._lock:
+            self.slots.clear()
+            self._save_index()
@@ -1,35 +1,54 @@
-import asyncio
 import datetime
+import threading
 import tkinter as tk
-import rocket_league_utils as rl_utils
-import rocket_league_gameflip_api as rl_gameflip_api
 import rocket_league_tkinter as rl_tk
 import bakkes_mod_inventory
 import typing
-from rocket_league_utils import rarity_utils, slot_utils
+from rocket_league_utils import rarity_utils
+from rocket_league_tkinter.lazy import lazy_import
+
+rl_gameflip_api = lazy_import("rocket_league_gameflip_api")
+
+
+class LazyGameflipAPI:
+    """Gameflip client created on its first use, which happens on the loader thread, not on the startup path."""
+
+    def __init__(self):
+        self._api = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        with self._lock:
+            if self._api is None:
+                self._api = rl_gameflip_api.RocketLeagueGameflipAPI()
+        return getattr(self._api, name)
 
 
 def gameflip_filter(item: bakkes_mod_inventory.Item) -> bool:
     return rarity_utils.is_valid(item.rarity) and not item.trade_lock
 
 
+def read_items() -> typing.Iterator[rl_tk.ItemRecord]:
+    for item in bakkes_mod_inventory.read_inventory():
+        if gameflip_filter(item):
+            yield rl_tk.ItemRecord(item.name, item.slot, item.rarity, item.quantity, item.blueprint, item.serie,
+                                   item.trade_lock, item.platform, datetime.datetime.now(), color=item.color,
+                                   certified=item.certified)
+
+
 def main():
-    gameflip_api = rl_gameflip_api.RocketLeagueGameflipAPI()
-    inventory = bakkes_mod_inventory.read_inventory()
-    inventory = tuple(filter(lambda item_: gameflip_filter(item_), inventory))
     window = tk.Tk()
-    tk_inventory = rl_tk.Inventory(window, gameflip_api)
-    items = [rl_utils.Item(item.name, item.slot, item.rarity, item.quantity, item.blueprint, item.serie,
-                           item.trade_lock, item.platform, datetime.datetime.now(), color=item.color,
-                           certified=item.certified) for item in inventory]
-    tk_inventory.slots.add_items(items)
+    tk_inventory = rl_tk.Inventory(window, LazyGameflipAPI())
     tk_inventory.pack()
+    snapshot = rl_tk.InventorySnapshot.load()
+    ingestion = tk_inventory.ingest(snapshot.merge(read_items()))
     window.mainloop()
+    if ingestion.done:
+        rl_tk.InventorySnapshot.save(tk_inventory.slots.items)
 
 
 def item_window():
-    gameflip_api = rl_gameflip_api.RocketLeagueGameflipAPI()
-    window = rl_tk.ItemWindow("Adicionar Item", gameflip_api)
+    window = rl_tk.ItemWindow("Adicionar Item", LazyGameflipAPI())
     window.mainloop()
 
 
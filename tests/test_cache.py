@@ -0,0 +1,47 @@
+import datetime
+import tempfile
+import unittest
+from rocket_league_tkinter.cache import IconCache
+
+ICON = bytes(range(256)) * 4
+
+
+class IconCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = IconCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_storing_the_same_icon_again_keeps_its_blob(self):
+        entry = self.cache.store("http://icons/0.png", ICON)
+        self.cache.store("http://icons/0.png", ICON)
+        self.assertTrue(self.cache._blob_path(entry.key).is_file())
+        self.assertEqual(self.cache.size, len(ICON))
+        self.assertEqual(self.cache.get("http://icons/0.png"), ICON)
+
+    def test_replaced_icon_blob_is_removed(self):
+        entry = self.cache.store("http://icons/0.png", ICON)
+        self.cache.store("http://icons/0.png", ICON[::-1])
+        self.assertFalse(self.cache._blob_path(entry.key).is_file())
+        self.assertEqual(self.cache.size, len(ICON))
+
+    def test_blob_shared_between_urls_outlives_one_of_them(self):
+        entry = self.cache.store("http://icons/0.png", ICON)
+        self.cache.store("http://icons/1.png", ICON)
+        self.cache.discard("http://icons/0.png")
+        self.assertTrue(self.cache._blob_path(entry.key).is_file())
+        self.assertEqual(self.cache.get("http://icons/1.png"), ICON)
+
+    def test_reloaded_index_keeps_the_stored_icon(self):
+        self.cache.store("http://icons/0.png", ICON)
+        self.cache.store("http://icons/0.png", ICON)
+        self.cache.flush()
+        cache = IconCache(self.directory.name, max_age=datetime.timedelta(days=1))
+        self.assertEqual(cache.get("http://icons/0.png"), ICON)
+        self.assertEqual(cache.size, len(ICON))
+
+
+if __name__ == "__main__":
+    unittest.main()
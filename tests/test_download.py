@@ -0,0 +1,81 @@
+import http.server
+import tempfile
+import threading
+import time
+import unittest
+from rocket_league_tkinter.cache import IconCache
+from rocket_league_tkinter.download import IconDownloader
+
+BODY = bytes(range(256)) * 240
+
+
+class SlowBodyServer:
+    """Sends the headers at once and then the body in chunks over body_time seconds."""
+
+    def __init__(self, body_time: float, chunks: int = 12):
+        self.body_time = body_time
+        self.chunks = chunks
+        self.requests = 0
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(BODY)))
+                self.end_headers()
+                self.wfile.flush()
+                chunk_size = -(-len(BODY) // server.chunks)
+                for start in range(0, len(BODY), chunk_size):
+                    time.sleep(server.body_time / server.chunks)
+                    self.wfile.write(BODY[start:start + chunk_size])
+                    self.wfile.flush()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class SlowBodyTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.server = None
+
+    async def asyncTearDown(self):
+        await self.downloader.close()
+        self.server.close()
+        self.directory.cleanup()
+
+    def create(self, body_time: float, timeout: float) -> IconDownloader:
+        self.server = SlowBodyServer(body_time)
+        self.downloader = IconDownloader(IconCache(self.directory.name), timeout=timeout, retry_backoff=0.01)
+        return self.downloader
+
+    async def test_slow_bodies_do_not_shrink_the_timeout(self):
+        downloader = self.create(0.6, 1)
+        for index in range(4):
+            self.assertEqual(await downloader.download(f"{self.server.url}/icons/{index}.png"), BODY)
+        self.assertEqual(self.server.requests, 4)
+        self.assertGreater(downloader._get_timeout(self.server.url).timeout, 0.6)
+
+    async def test_retries_double_the_timeout(self):
+        downloader = self.create(0.5, 0.2)
+        self.assertEqual(await downloader.download(f"{self.server.url}/icons/0.png"), BODY)
+        self.assertEqual(self.server.requests, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()